@@ -1,20 +1,81 @@
-def generate_summary(df):
-    total_sales = df["Total_Sales"].sum()
+import pandas as pd
 
-    best_product = df.groupby("Product")["Total_Sales"].sum().idxmax()
-    worst_product = df.groupby("Product")["Total_Sales"].sum().idxmin()
+from profiling import profiled
+
+
+@profiled()
+def product_aggregates(df):
+    """
+    Single aggregation pass shared by every analysis below.
+
+    Products are factorized to integer codes first, so the groupby runs over
+    ints instead of strings. Rows come out sorted by product name (same order
+    as df.groupby("Product")) with columns:
+    Product, Total_Sales, Total_Quantity, Avg_Sales, Transaction_Count,
+    Contribution_Percentage
+    """
+
+    codes, products = pd.factorize(df["Product"], sort=True)
+
+    values = pd.DataFrame({
+        "Total_Sales": df["Total_Sales"].to_numpy(),
+        "Total_Quantity": df["Quantity"].to_numpy(),
+    })
+    grouped = values.groupby(codes, sort=True)
+    sums = grouped.sum()
+    counts = grouped.size()
+
+    agg = pd.DataFrame({
+        "Product": products,
+        "Total_Sales": sums["Total_Sales"].to_numpy(),
+        "Total_Quantity": sums["Total_Quantity"].to_numpy(),
+        "Transaction_Count": counts.to_numpy(),
+    })
+
+    return complete_product_aggregates(agg)
+
+
+def complete_product_aggregates(agg):
+    """
+    Add Avg_Sales and Contribution_Percentage to additive per-product totals
+    (Product, Total_Sales, Total_Quantity, Transaction_Count).
+
+    Lets stored / merged totals (append mode) feed the same analyses.
+    """
+
+    agg = agg.copy()
+    agg["Avg_Sales"] = agg["Total_Sales"] / agg["Transaction_Count"]
+
+    total_sales_overall = agg["Total_Sales"].sum()
+    agg["Contribution_Percentage"] = (agg["Total_Sales"] / total_sales_overall) * 100
+
+    return agg[[
+        "Product", "Total_Sales", "Total_Quantity", "Avg_Sales",
+        "Transaction_Count", "Contribution_Percentage"
+    ]]
+
+
+def generate_summary(df, agg=None):
+    if agg is None:
+        agg = product_aggregates(df)
+
+    total_rows = int(agg["Transaction_Count"].sum())
+    total_sales = agg["Total_Sales"].sum()
+
+    best_product = agg.at[agg["Total_Sales"].idxmax(), "Product"]
+    worst_product = agg.at[agg["Total_Sales"].idxmin(), "Product"]
 
     return {
-        "Total Rows": len(df),
-        "Total Products": int(df["Product"].nunique()),
+        "Total Rows": total_rows,
+        "Total Products": int(len(agg)),
         "Total Sales": float(total_sales),
-        "Average Sale per Transaction": float(df["Total_Sales"].mean()),
+        "Average Sale per Transaction": float(total_sales / total_rows),
         "Best Selling Product": best_product,
         "Worst Selling Product": worst_product
     }
 
 
-def top_low_products(df, n=10):
+def top_low_products(df, n=10, agg=None):
     """
     Smart Top/Low mechanism:
 
@@ -29,7 +90,10 @@ def top_low_products(df, n=10):
     This guarantees Top and Low sections will not show same products.
     """
 
-    product_sales = df.groupby("Product")["Total_Sales"].sum().sort_values(ascending=False)
+    if agg is None:
+        agg = product_aggregates(df)
+
+    product_sales = agg.set_index("Product")["Total_Sales"].sort_values(ascending=False)
     total_products = len(product_sales)
 
     # Case 1: Many products → Top 10 and Low 10
@@ -53,16 +117,29 @@ def top_low_products(df, n=10):
     return top_df, low_df
 
 
-def product_sales_summary(df):
-    summary = df.groupby("Product").agg(
-        Total_Sales=("Total_Sales", "sum"),
-        Total_Quantity=("Quantity", "sum"),
-        Avg_Sales=("Total_Sales", "mean"),
-        Transaction_Count=("Total_Sales", "count")
-    ).reset_index()
+def product_sales_summary(df, agg=None):
+    if agg is None:
+        agg = product_aggregates(df)
 
-    total_sales_overall = summary["Total_Sales"].sum()
-    summary["Contribution_Percentage"] = (summary["Total_Sales"] / total_sales_overall) * 100
-
-    summary = summary.sort_values("Total_Sales", ascending=False)
+    summary = agg.sort_values("Total_Sales", ascending=False)
     return summary
+
+
+@profiled()
+def analyze_sales(df, n=10, agg=None):
+    """
+    Summary, Top/Low products and product summary from ONE aggregation pass.
+
+    Pass a precomputed agg (e.g. from an append-mode store) to skip the pass;
+    df may then be None.
+    Returns (summary, top_df, low_df, product_summary).
+    """
+
+    if agg is None:
+        agg = product_aggregates(df)
+
+    summary = generate_summary(df, agg=agg)
+    top_df, low_df = top_low_products(df, n=n, agg=agg)
+    product_summary = product_sales_summary(df, agg=agg)
+
+    return summary, top_df, low_df, product_summary
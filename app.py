@@ -1,41 +1,120 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import os
-import joblib
-import chardet
-from io import BytesIO
-
-from mapper import auto_detect_columns
-from preprocess import preprocess_data
-from analysis import generate_summary, top_low_products, product_sales_summary
-from forecasting import train_product_forecast_model, predict_product_future_sales, get_top_future_products
-from report_pdf import generate_pdf_report
+import time
+
+from mapper import auto_detect_columns, profile_columns
+import preprocess
+import profiling
+from profiling import stage
+from ingest import detect_encoding, read_csv_preview, load_clean_streaming
+from session_cache import DerivedCache
+from dataset_cache import file_content_hash, dataset_cache_key, load_cached_dataset, store_cached_dataset
+from analysis import analyze_sales
+from sales_cube import CELL_COLUMNS, build_sales_cube
+from out_of_core import load_out_of_core
+from charts import (
+    build_trend_series, cube_trend_series, select_trend_points, forecast_chart_frame, cached_chart_png,
+    trend_figure, top_products_figure, forecast_figure
+)
+from append_store import (
+    store_path, append_delta, read_store_meta, load_store_rows, load_product_aggregates, load_daily_sales
+)
+from forecasting import (
+    ProductEncoder, train_product_forecast_model, update_product_forecast_model,
+    predict_product_future_sales, get_top_future_products
+)
+from forecast_backends import BACKENDS, DEFAULT_BACKEND
+from model_registry import (
+    registry_key, read_model_meta, find_latest_model, is_compatible, register_model, load_model
+)
+from jobs import JobManager
+from report_pdf import pdf_report_bytes
+from exports import available_formats, read_export, export_file_name, export_mime
 
 st.set_page_config(page_title="Universal Company Analyzer", layout="wide")
 st.title("📊 Universal Company Data Analyzer (Works with ANY Dataset)")
 
+# Cached here, not in preprocess.py, so batch workers never import Streamlit
+preprocess_data = st.cache_data(preprocess.preprocess_data)
+
+# ---------------- LAZY EXPORTS ----------------
+def cleaned_dataset_download(df, fingerprint, key):
+    """
+    Download button for the cleaned dataset. The file is only written when
+    the button is clicked, once per dataset fingerprint and format, then
+    served from the on-disk export cache. df may also be a function
+    returning the frame (append-mode stores are read only on click).
+    """
+
+    get_frame = df if callable(df) else (lambda: df)
+
+    # Out-of-core sessions only hold per-day product totals
+    name, label = ("daily_product_sales", "Daily Product Sales") \
+        if not callable(df) and df.attrs.get("out_of_core") else ("cleaned_dataset", "Cleaned Dataset")
+
+    fmt = st.selectbox("Export Format", available_formats(), key=f"{key}_format")
+    st.download_button(
+        f"⬇️ Download {label} ({fmt})",
+        lambda: read_export(fingerprint, name, fmt, get_frame),
+        export_file_name(name, fmt),
+        export_mime(fmt),
+        key=key
+    )
+
 # ---------------- SAFE CSV READER ----------------
 @st.cache_data
 def read_csv_safely(uploaded_file):
-    file_bytes = uploaded_file.getvalue()
-
-    detected = chardet.detect(file_bytes)
-    encoding = detected.get("encoding") or "utf-8"
+    encoding = detect_encoding(uploaded_file)
 
     try:
-        df = pd.read_csv(BytesIO(file_bytes), encoding=encoding)
+        df = pd.read_csv(uploaded_file, encoding=encoding)
         return df, encoding
     except Exception:
         for enc in ["utf-8", "latin1", "cp1252"]:
             try:
-                df = pd.read_csv(BytesIO(file_bytes), encoding=enc)
+                uploaded_file.seek(0)
+                df = pd.read_csv(uploaded_file, encoding=enc)
                 return df, enc
             except Exception:
                 continue
 
     raise ValueError("Could not read this CSV file. Please re-save as UTF-8 or try another dataset.")
 
+# ---------------- BACKGROUND JOBS ----------------
+JOB_POLL_SECONDS = 1.0
+
+
+@st.cache_resource
+def get_job_manager():
+    # One bounded pool per server process, shared by all sessions
+    return JobManager()
+
+
+def train_and_register(df_clean, fingerprint, config, progress, cube=None):
+    started = time.perf_counter()
+    model, le = train_product_forecast_model(df_clean, backend=config["backend"], progress=progress, cube=cube)
+    fit_seconds = round(time.perf_counter() - started, 3)
+    return register_model(fingerprint, config, model, le, df_clean, {"fit_seconds": fit_seconds})
+
+
+def dataset_rows():
+    """
+    Cleaned rows of the current dataset. In append mode they are read from
+    the store only when a stage needs transactions (training, prediction,
+    slicing, export), once per store version.
+    """
+
+    store_dir = st.session_state.get("store_dir")
+    if store_dir is None:
+        return st.session_state["df_clean"]
+
+    fingerprint = st.session_state["dataset_fingerprint"]
+    if st.session_state.get("store_rows_fp") != fingerprint:
+        st.session_state["store_rows"] = load_store_rows(store_dir)
+        st.session_state["store_rows_fp"] = fingerprint
+    return st.session_state["store_rows"]
+
+
 # Sidebar navigation
 st.sidebar.header("📌 Navigation")
 menu = st.sidebar.radio(
@@ -43,11 +122,39 @@ menu = st.sidebar.radio(
     ["Upload & Process", "Sales Analytics", "Product Insights", "Forecasting (Product Wise)", "Downloads"]
 )
 
+large_file_mode = st.sidebar.checkbox(
+    "Large file mode (streaming)",
+    help="Read the CSV in chunks and keep only cleaned, mapped columns in memory."
+)
+
+store_name = st.sidebar.text_input(
+    "Append mode: store name (optional)",
+    help="Treat each upload as new transactions and merge it into this persistent store."
+).strip()
+
+out_of_core_mode = st.sidebar.checkbox(
+    "Out-of-core mode (data larger than RAM)",
+    help="Clean the CSV chunk by chunk into Parquet files on disk and aggregate there "
+         "(DuckDB if installed, else Arrow). Only per-day product totals are loaded."
+)
+
+profiling_on = st.sidebar.checkbox(
+    "⏱ Performance profiling",
+    help="Record time, rows and peak memory per pipeline stage (process-wide, on while any "
+         "session has it checked; off everywhere = no overhead)."
+)
+# Each session holds its own reference, released when unchecked or when the session ends
+if profiling_on and "profiling_hold" not in st.session_state:
+    st.session_state["profiling_hold"] = profiling.hold()
+elif not profiling_on and "profiling_hold" in st.session_state:
+    st.session_state.pop("profiling_hold").release()
+
 uploaded_file = st.file_uploader("📂 Upload CSV File", type=["csv"])
 
 if uploaded_file:
     try:
-        df, used_encoding = read_csv_safely(uploaded_file)
+        # Full read happens only when the cleaned dataset is not cached yet
+        df, used_encoding = read_csv_preview(uploaded_file)
         st.success(f"✅ File loaded successfully (Encoding: {used_encoding})")
     except Exception as e:
         st.error(f"❌ CSV Read Error: {e}")
@@ -59,8 +166,11 @@ if uploaded_file:
         st.dataframe(df.head())
 
         st.subheader("🧠 Auto Column Detection")
-        detected = auto_detect_columns(df.columns)
+        # Scored on header names + sampled preview values
+        detected = auto_detect_columns(df.columns, df)
         st.write("Detected Mapping:", detected)
+        with st.expander("Column Profile"):
+            st.dataframe(profile_columns(df))
 
         st.subheader("🛠 Column Mapping (Select Correct Columns)")
         cols = list(df.columns)
@@ -86,12 +196,60 @@ if uploaded_file:
             index=cols.index(detected["price"]) if detected["price"] and detected["price"] in cols else 0
         )
 
-        sales_col = st.selectbox("Select Sales Column (optional)", [None] + cols, index=0)
+        sales_col = st.selectbox(
+            "Select Sales Column (optional)",
+            [None] + cols,
+            index=cols.index(detected["sales"]) + 1 if detected["sales"] and detected["sales"] in cols else 0
+        )
+
+        mapping = (date_col, product_col, qty_col, price_col, sales_col)
+
+        file_hashes = st.session_state.setdefault("file_hashes", {})
+        if uploaded_file.file_id not in file_hashes:
+            file_hashes[uploaded_file.file_id] = file_content_hash(uploaded_file)
+        dataset_key = dataset_cache_key(file_hashes[uploaded_file.file_id], mapping)
+        if out_of_core_mode:
+            dataset_key = f"ooc-{dataset_key}"
+
+        processed = st.session_state.get("processed")
+        if processed is None or processed[0] != dataset_key:
+            cached = None if out_of_core_mode else load_cached_dataset(dataset_key)
+            if out_of_core_mode:
+                # Rows stay on disk; the session holds (day, product) cells only
+                with st.spinner("Cleaning CSV into on-disk Parquet (out-of-core)..."):
+                    engine, original_rows = load_out_of_core(uploaded_file, dataset_key, *mapping)
+                    df_clean = engine.product_day_cells() if engine else pd.DataFrame(columns=CELL_COLUMNS)
+                    df_clean.attrs["clean_rows"] = engine.row_count() if engine else 0
+                    df_clean.attrs["out_of_core"] = True
+            elif cached is not None:
+                df_clean, original_rows = cached
+            elif large_file_mode:
+                with st.spinner("Streaming and cleaning CSV in chunks..."):
+                    df_clean, original_rows, _ = load_clean_streaming(uploaded_file, *mapping)
+            else:
+                with stage("app.read_csv_safely") as record:
+                    raw_df, _ = read_csv_safely(uploaded_file)
+                    record["rows"] = len(raw_df)
+                df_clean = preprocess_data(raw_df, *mapping)
+                original_rows = len(raw_df)
+
+            if cached is None and not out_of_core_mode and not df_clean.empty:
+                store_cached_dataset(dataset_key, df_clean, original_rows)
+
+            processed = (dataset_key, df_clean, original_rows)
+            st.session_state["processed"] = processed
 
-        df_clean = preprocess_data(df, date_col, product_col, qty_col, price_col, sales_col)
+        _, df_clean, original_rows = processed
 
-        st.write("Original Rows:", len(df))
-        st.write("Clean Rows:", len(df_clean))
+        st.write("Original Rows:", original_rows)
+        st.write("Clean Rows:", df_clean.attrs.get("clean_rows", len(df_clean)))
+
+        footprint = df_clean.attrs.get("memory_footprint")
+        if footprint:
+            st.write(
+                "Memory Footprint:",
+                f"{footprint['before_mb']:.1f} MB → {footprint['after_mb']:.1f} MB (compact schema)"
+            )
 
         if df_clean.empty:
             st.error("❌ After cleaning dataset became empty. Please select correct columns.")
@@ -100,22 +258,54 @@ if uploaded_file:
         st.success("✅ Dataset processed successfully!")
         st.dataframe(df_clean.head())
 
-        st.download_button(
-            "⬇️ Download Cleaned Dataset (CSV)",
-            df_clean.to_csv(index=False).encode("utf-8"),
-            "cleaned_dataset.csv",
-            "text/csv"
-        )
+        cleaned_dataset_download(df_clean, dataset_key, key="upload_download")
+
+        # ---------------- Append Mode ----------------
+        # The upload is a delta: merge it into the store, then work on the store
+        st.session_state.pop("store_dir", None)
+        if store_name and out_of_core_mode:
+            st.warning("⚠️ Append mode is not available in out-of-core mode.")
+        elif store_name:
+            store_dir = store_path(store_name)
+
+            if st.button(f"➕ Append This File To Store '{store_name}'"):
+                stats = append_delta(store_dir, df_clean, original_rows)
+                st.success(
+                    f"✅ Appended {stats['new_rows']} new rows "
+                    f"({stats['duplicate_rows']} duplicates skipped)"
+                )
+
+            store_meta = read_store_meta(store_dir)
+            if store_meta["parts"]:
+                st.info(f"ℹ️ Using store '{store_name}': {store_meta['rows']} rows from {store_meta['parts']} uploads.")
+                # Summaries and trend read the store's aggregates; rows load lazily (dataset_rows)
+                df_clean = None
+                dataset_key = f"store:{store_meta['version']}"
+                st.session_state["store_dir"] = store_dir
 
         st.session_state["df_clean"] = df_clean
+        st.session_state["dataset_fingerprint"] = dataset_key
 
     # ---------------- AFTER PROCESSING ----------------
     if "df_clean" in st.session_state:
         df_clean = st.session_state["df_clean"]
-
-        summary = generate_summary(df_clean)
-        top_df, low_df = top_low_products(df_clean)
-        product_summary = product_sales_summary(df_clean)
+        fingerprint = st.session_state["dataset_fingerprint"]
+        store_dir = st.session_state.get("store_dir")
+
+        # Derived results are reused across reruns until the dataset changes
+        derived = st.session_state.setdefault("derived_cache", DerivedCache())
+
+        # Product x day cube: one aggregation pass feeding summaries, charts,
+        # slicing and forecast training (built on first use; in append mode
+        # only slicing and training need it)
+        def get_cube():
+            return derived.get(fingerprint, "sales_cube", lambda: build_sales_cube(dataset_rows()))
+
+        # Append mode reads the store's persisted aggregates instead of re-aggregating
+        summary, top_df, low_df, product_summary = derived.get(
+            fingerprint, "analytics",
+            lambda: analyze_sales(None, agg=load_product_aggregates(store_dir) if store_dir else get_cube().product_totals())
+        )
 
         # ---------------- Sales Analytics ----------------
         if menu == "Sales Analytics":
@@ -130,13 +320,42 @@ if uploaded_file:
             col6.metric("Total Transactions", summary["Total Rows"])
 
             st.subheader("📊 Sales Trend Over Time")
-            daily_sales = df_clean.groupby("Date")["Total_Sales"].sum().reset_index()
-            fig, ax = plt.subplots(figsize=(10, 4))
-            ax.plot(daily_sales["Date"], daily_sales["Total_Sales"])
-            ax.set_title("Sales Trend")
-            ax.set_xlabel("Date")
-            ax.set_ylabel("Total Sales")
-            st.pyplot(fig)
+            # Day/week/month series are built once per dataset; the drawn
+            # series is capped at MAX_CHART_POINTS and the PNG is cached
+            trend_series = derived.get(
+                fingerprint, "trend_series",
+                lambda: build_trend_series(load_daily_sales(store_dir)) if store_dir
+                else cube_trend_series(get_cube())
+            )
+            resolution = st.radio("Resolution", ["auto", "day", "week", "month"], horizontal=True)
+            with stage("app.render_sales_trend", rows=len(trend_series["day"])):
+                points, used, downsampled = select_trend_points(trend_series, resolution)
+                st.image(cached_chart_png(
+                    ("trend", fingerprint, used, len(points)),
+                    lambda: trend_figure(points, used)
+                ))
+                if downsampled:
+                    st.caption(f"Showing {len(points)} of {len(trend_series[used])} {used} points (downsampled).")
+
+            with st.expander("🔎 Slice Sales (date range / products)"):
+                # In append mode the cube needs every stored row: build it on request
+                if store_dir and not st.checkbox("Load stored rows for slicing"):
+                    st.caption("Slicing a store reads all of its rows.")
+                else:
+                    cube = get_cube()
+                    first_day, last_day = cube.dates_[0].date(), cube.dates_[-1].date()
+                    date_range = st.date_input(
+                        "Date Range", (first_day, last_day), min_value=first_day, max_value=last_day
+                    )
+                    slice_products = st.multiselect("Products (empty = all)", list(cube.products_))
+
+                    if len(date_range) == 2:
+                        with stage("app.cube_slice"):
+                            slice_agg = cube.product_totals(
+                                date_range[0], date_range[1], slice_products or None
+                            )
+                        st.metric("Sales In Slice", f"{slice_agg['Total_Sales'].sum():.2f}")
+                        st.dataframe(slice_agg.sort_values("Total_Sales", ascending=False))
 
         # ---------------- Product Insights ----------------
         if menu == "Product Insights":
@@ -152,92 +371,142 @@ if uploaded_file:
             st.dataframe(product_summary)
 
             st.subheader("📊 Top Products Bar Chart")
-            fig, ax = plt.subplots(figsize=(10, 4))
-            top_df.head(10).plot.bar(x="Product", y="Total_Sales", ax=ax)
-            ax.set_title("Top 10 Products by Sales")
-            ax.set_ylabel("Total Sales")
-            st.pyplot(fig)
+            with stage("app.render_top_products", rows=len(top_df)):
+                st.image(cached_chart_png(("top_products", fingerprint), lambda: top_products_figure(top_df)))
 
         # ---------------- Forecasting ----------------
         if menu == "Forecasting (Product Wise)":
             st.subheader("🤖 Product-Wise Forecasting")
 
-            model_path = "models/product_forecast_model.pkl"
+            backend = st.selectbox(
+                "Forecast Engine",
+                list(BACKENDS),
+                index=list(BACKENDS).index(DEFAULT_BACKEND),
+                help="hist_gradient_boosting trains faster with much smaller models on big data; "
+                     "seasonal_baseline is a near-instant trend + weekday baseline."
+            )
 
-            # Load model if exists
-            model, le = None, None
-            if os.path.exists(model_path):
-                model, le = joblib.load(model_path)
+            # Models are registered per dataset fingerprint + training config
+            config = {"backend": backend}
+            model_key = registry_key(fingerprint, config)
 
-                # Check if new products exist
-                trained_products = set(le.classes_)
-                current_products = set(df_clean["Product"].unique())
+            # Load model if exists (shared, memory-mapped, cached per process)
+            model, le = None, None
+            if read_model_meta(model_key) is not None:
+                model, le = load_model(model_key)
+            else:
+                previous = find_latest_model(config)
+                if previous is not None:
+                    st.info(
+                        f"ℹ️ No model for this dataset yet. Latest {backend} model covers "
+                        f"{previous['date_min']} → {previous['date_max']} ({len(previous['products'])} products)."
+                    )
 
-                if not current_products.issubset(trained_products):
-                    st.warning("⚠️ New products found in this CSV. Please retrain model to avoid unseen label error.")
-                    model, le = None, None
+                    # Check if new products exist (from metadata, without loading the model)
+                    if not is_compatible(previous, product_summary["Product"].astype(str)):
+                        st.warning("⚠️ New products found in this CSV. Update the model to include them.")
+
+                    if st.button("Update Latest Model With This Data"):
+                        prev_model, prev_le = load_model(previous["key"], writable=True)
+                        if isinstance(prev_le, ProductEncoder):
+                            rows = dataset_rows()
+                            model, le, new_rows = update_product_forecast_model(prev_model, prev_le, rows)
+                            register_model(
+                                fingerprint, config, model, le, rows,
+                                {"updated_from": previous["key"], "new_daily_rows": new_rows}
+                            )
+                            st.success(f"✅ Model updated with {new_rows} new daily product rows!")
+                        else:
+                            st.warning("⚠️ This model was saved without training history. Please retrain it.")
+
+            jobs = get_job_manager()
+            needs_poll = False
 
             if st.button("Train Product Forecast Model"):
-                model, le = train_product_forecast_model(df_clean)
-                os.makedirs("models", exist_ok=True)
-                joblib.dump((model, le), model_path)
-                st.success("✅ Product forecast model trained & saved!")
+                st.session_state["train_job"] = jobs.submit(
+                    f"train:{model_key}", train_and_register, dataset_rows(), fingerprint, config,
+                    cube=get_cube(), name="Train product forecast model"
+                )
+
+            train_job = jobs.get(st.session_state.get("train_job"))
+            if train_job is not None:
+                if train_job.active:
+                    st.progress(train_job.progress, text=f"🔄 Training: {train_job.message}")
+                    needs_poll = True
+                elif train_job.status == "failed":
+                    st.error(f"❌ Training failed: {train_job.error}")
+                    st.session_state.pop("train_job")
+                else:
+                    model, le = load_model(train_job.result)
+                    st.success("✅ Product forecast model trained & saved!")
+                    st.session_state.pop("train_job")
 
             if model is not None and le is not None:
                 future_days = st.number_input("Predict next N days", min_value=1, max_value=60, value=7)
 
-                product_options = ["All Products"] + list(df_clean["Product"].unique())
+                product_options = ["All Products"] + list(product_summary["Product"])
                 selected_product = st.selectbox("Select Product (or All)", product_options, index=0)
 
                 if st.button("Predict Future Sales"):
                     selected_prod = None if selected_product == "All Products" else selected_product
-
-                    future_df = predict_product_future_sales(df_clean, model, le, future_days, selected_prod)
-                    st.dataframe(future_df)
-
-                    if selected_prod is None and not future_df.empty:
-                        top_future = get_top_future_products(future_df)
-                        st.subheader("🏆 Top Future Selling Products")
-                        st.dataframe(top_future)
-
-                    if not future_df.empty:
-                        st.subheader("📈 Future Sales Prediction Chart (Top 5 Products)")
-                        fig, ax = plt.subplots(figsize=(10, 4))
-                        for prod in future_df["Product"].unique()[:5]:
-                            prod_data = future_df[future_df["Product"] == prod]
-                            ax.plot(prod_data["Date"], prod_data["Predicted_Sales"], label=prod)
-
-                        ax.set_title("Future Sales Prediction")
-                        ax.set_xlabel("Date")
-                        ax.set_ylabel("Predicted Sales")
-                        ax.legend()
-                        st.pyplot(fig)
-
-                    st.session_state["future_df"] = future_df
-            else:
+                    st.session_state["predict_job"] = jobs.submit(
+                        f"predict:{model_key}:{future_days}:{selected_prod}",
+                        predict_product_future_sales, dataset_rows(), model, le, future_days, selected_prod,
+                        name="Predict future sales"
+                    )
+                    st.session_state["predict_product"] = selected_prod
+
+                predict_job = jobs.get(st.session_state.get("predict_job"))
+                if predict_job is not None:
+                    if predict_job.active:
+                        st.progress(predict_job.progress, text=f"🔄 Predicting: {predict_job.message}")
+                        needs_poll = True
+                    elif predict_job.status == "failed":
+                        st.error(f"❌ Prediction failed: {predict_job.error}")
+                        st.session_state.pop("predict_job")
+                    else:
+                        future_df = predict_job.result
+                        selected_prod = st.session_state.get("predict_product")
+                        st.dataframe(future_df)
+
+                        if selected_prod is None and not future_df.empty:
+                            top_future = get_top_future_products(future_df)
+                            st.subheader("🏆 Top Future Selling Products")
+                            st.dataframe(top_future)
+
+                        if not future_df.empty:
+                            st.subheader("📈 Future Sales Prediction Chart (Top 5 Products)")
+                            with stage("app.render_forecast_chart", rows=len(future_df)):
+                                st.image(cached_chart_png(
+                                    ("forecast", predict_job.id),
+                                    lambda: forecast_figure(forecast_chart_frame(future_df))
+                                ))
+
+                        st.session_state["future_df"] = future_df
+            elif not needs_poll:
                 st.info("ℹ️ Train the model first to enable forecasting.")
 
+            # Poll running jobs (the work itself runs in the job pool)
+            if needs_poll:
+                time.sleep(JOB_POLL_SECONDS)
+                st.rerun()
+
         # ---------------- Downloads ----------------
         if menu == "Downloads":
             st.subheader("⬇️ Download Reports & Data")
 
-            st.download_button(
-                "⬇️ Download Cleaned Dataset (CSV)",
-                df_clean.to_csv(index=False).encode("utf-8"),
-                "cleaned_dataset.csv",
-                "text/csv"
-            )
+            cleaned_dataset_download(dataset_rows if store_dir else df_clean, fingerprint, key="downloads_download")
 
             st.download_button(
                 "⬇️ Download Top Products (CSV)",
-                top_df.to_csv(index=False).encode("utf-8"),
+                lambda: top_df.to_csv(index=False),
                 "top_products.csv",
                 "text/csv"
             )
 
             st.download_button(
                 "⬇️ Download Low Products (CSV)",
-                low_df.to_csv(index=False).encode("utf-8"),
+                lambda: low_df.to_csv(index=False),
                 "low_products.csv",
                 "text/csv"
             )
@@ -246,22 +515,37 @@ if uploaded_file:
                 future_df = st.session_state["future_df"]
                 st.download_button(
                     "⬇️ Download Future Predictions (CSV)",
-                    future_df.to_csv(index=False).encode("utf-8"),
+                    lambda: future_df.to_csv(index=False),
                     "future_predictions.csv",
                     "text/csv"
                 )
 
             if st.button("Generate PDF Report"):
                 future_df = st.session_state.get("future_df", None)
-                filename = generate_pdf_report(summary, top_df, low_df, future_df, filename="company_report.pdf")
-
-                with open(filename, "rb") as f:
-                    st.download_button(
-                        "⬇️ Download PDF Report",
-                        f,
-                        file_name="company_report.pdf",
-                        mime="application/pdf"
-                    )
+                with stage("app.pdf_report"):
+                    pdf = pdf_report_bytes(summary, top_df, low_df, future_df, product_summary)
+
+                st.download_button(
+                    "⬇️ Download PDF Report",
+                    pdf,
+                    file_name="company_report.pdf",
+                    mime="application/pdf"
+                )
 
 else:
     st.info("👆 Upload a CSV file to start.")
+
+# ---------------- Performance ----------------
+if profiling_on:
+    with st.expander("⏱ Performance", expanded=False):
+        st.subheader("Per-Stage Totals")
+        st.dataframe(profiling.summary_frame())
+
+        st.subheader("All Recorded Stages")
+        st.dataframe(profiling.to_frame())
+
+        col1, col2, col3 = st.columns(3)
+        col1.download_button("⬇️ Export JSON", profiling.export_json(), "performance.json", "application/json")
+        col2.download_button("⬇️ Export CSV", profiling.export_csv(), "performance.csv", "text/csv")
+        if col3.button("🧹 Clear Records"):
+            profiling.clear()
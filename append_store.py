@@ -0,0 +1,383 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from analysis import complete_product_aggregates
+
+STORE_ROOT = os.path.join("cache", "stores")
+ROW_COLUMNS = ["Date", "Product", "Quantity", "Price", "Total_Sales"]
+
+# Row hashes are bucketed by their top INDEX_BITS bits (256 files)
+INDEX_BITS = 8
+
+# A store directory looks like:
+#   rows/part-00001.parquet     cleaned, de-duplicated rows of each delta
+#   index/bucket-0a3.npy        sorted hashes of every stored row in one hash bucket
+#   product_agg.parquet         additive per-product totals
+#   daily_agg.parquet           per-day sales totals
+#   meta.json                   part count, row counts, version
+#
+# A row can only be in the bucket of its own hash, so checking a delta costs
+# one binary search per row whatever the number of parts.
+
+# Appends read-modify-write meta.json and the aggregates: one writer per store
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def row_hashes(df):
+    """
+    uint64 hash per cleaned row over all columns (what drop_duplicates compares).
+
+    Columns are normalized first (ns dates, plain product values, float
+    numbers) so the same row hashes the same no matter which delta's
+    compact dtypes it came with.
+    """
+
+    normalized = pd.DataFrame({
+        "Date": df["Date"].to_numpy().astype("datetime64[ns]"),
+        "Product": np.asarray(df["Product"], dtype=object),
+        "Quantity": df["Quantity"].to_numpy(dtype=np.float64),
+        "Price": df["Price"].to_numpy(dtype=np.float64),
+        "Total_Sales": df["Total_Sales"].to_numpy(dtype=np.float64),
+    })
+    return pd.util.hash_pandas_object(normalized, index=False).to_numpy()
+
+
+def store_path(name, root=STORE_ROOT):
+    """
+    Directory of a named store (name is reduced to a safe file name).
+    """
+
+    safe = re.sub(r"[^A-Za-z0-9_.-]", "_", name).strip(".") or "default"
+    return os.path.join(root, safe)
+
+
+def _write_atomic(path, write):
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _save_array(path, values):
+    # np.save(path) would append ".npy" to the temp name
+    with open(path, "wb") as f:
+        np.save(f, values)
+
+
+def _save_json(path, data):
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+
+
+def read_store_meta(store_dir):
+    path = os.path.join(store_dir, "meta.json")
+    if not os.path.exists(path):
+        return {"parts": 0, "rows": 0, "raw_rows": 0, "version": ""}
+    with open(path) as f:
+        return json.load(f)
+
+
+def store_fingerprint(store_dir):
+    """
+    Changes with every append (used to key caches and models).
+    """
+
+    return read_store_meta(store_dir)["version"]
+
+
+def _store_lock(store_dir):
+    with _locks_guard:
+        return _locks.setdefault(os.path.abspath(store_dir), threading.Lock())
+
+
+def _bucket_path(store_dir, bucket):
+    return os.path.join(store_dir, "index", f"bucket-{bucket:03x}.npy")
+
+
+def _split_by_bucket(hashes):
+    # Yields (bucket, positions of the hashes in that bucket)
+    buckets = (hashes >> np.uint64(64 - INDEX_BITS)).astype(np.int64)
+    order = np.argsort(buckets, kind="stable")
+    bounds = np.searchsorted(buckets[order], np.arange((1 << INDEX_BITS) + 1))
+    for bucket in np.flatnonzero(np.diff(bounds)):
+        yield int(bucket), order[bounds[bucket]:bounds[bucket + 1]]
+
+
+def _known_mask(hashes, store_dir):
+    # Bucket files are memory-mapped and binary-searched, so checking a
+    # delta never loads the whole history index.
+    known = np.zeros(len(hashes), dtype=bool)
+    for bucket, positions in _split_by_bucket(hashes):
+        path = _bucket_path(store_dir, bucket)
+        if not os.path.exists(path):
+            continue
+        index = np.load(path, mmap_mode="r")
+        if len(index) == 0:
+            continue
+        values = hashes[positions]
+        pos = np.minimum(np.searchsorted(index, values), len(index) - 1)
+        known[positions] = np.asarray(index[pos]) == values
+    return known
+
+
+def _add_to_index(store_dir, hashes):
+    # Merge new (unknown) hashes into the buckets they touch; other buckets stay as they are
+    os.makedirs(os.path.join(store_dir, "index"), exist_ok=True)
+    for bucket, positions in _split_by_bucket(hashes):
+        path = _bucket_path(store_dir, bucket)
+        merged = np.sort(hashes[positions])
+        if os.path.exists(path):
+            index = np.load(path)
+            merged = np.insert(index, np.searchsorted(index, merged), merged)
+        _write_atomic(path, lambda tmp_path: _save_array(tmp_path, merged))
+
+
+def _product_totals(rows):
+    return pd.DataFrame({
+        "Product": np.asarray(rows["Product"], dtype=object),
+        "Total_Sales": rows["Total_Sales"].to_numpy(dtype=np.float64),
+        "Total_Quantity": rows["Quantity"].to_numpy(dtype=np.float64),
+        "Transaction_Count": 1,
+    }).groupby("Product", as_index=False).sum()
+
+
+def _daily_totals(rows):
+    return rows.groupby("Date", as_index=False)["Total_Sales"].sum()
+
+
+def append_delta(store_dir, df_delta, raw_rows=None):
+    """
+    Merge a cleaned delta (output of preprocess_data) into the store.
+
+    Steps:
+    1) Hash delta rows; drop rows already in the store (bucketed row-hash index)
+    2) Write the new rows as one more Parquet part; merge their hashes into the index
+    3) Add the new rows' totals into the per-product and per-day aggregates
+
+    Lookups follow the delta size, not the stored history or part count.
+    Concurrent appends to the same store (e.g. two sessions) run one at a time.
+    Returns {"delta_rows", "new_rows", "duplicate_rows"}.
+    """
+
+    df_delta = df_delta[ROW_COLUMNS]
+    hashes = row_hashes(df_delta)
+
+    # Drop duplicates inside the delta first
+    _, first = np.unique(hashes, return_index=True)
+    keep = np.zeros(len(hashes), dtype=bool)
+    keep[first] = True
+
+    with _store_lock(store_dir):
+        os.makedirs(os.path.join(store_dir, "rows"), exist_ok=True)
+        meta = read_store_meta(store_dir)
+
+        # ...then rows the store already has
+        keep &= ~_known_mask(hashes, store_dir)
+
+        new_rows = df_delta[keep]
+        stats = {
+            "delta_rows": int(len(df_delta)),
+            "new_rows": int(len(new_rows)),
+            "duplicate_rows": int(len(df_delta) - len(new_rows)),
+        }
+        if new_rows.empty:
+            return stats
+
+        part = meta["parts"] + 1
+        _write_atomic(
+            os.path.join(store_dir, "rows", f"part-{part:05d}.parquet"),
+            lambda path: new_rows.to_parquet(path, index=False)
+        )
+        _add_to_index(store_dir, hashes[keep])
+
+        # Merge additive totals
+        delta_products = _product_totals(new_rows)
+        delta_daily = _daily_totals(new_rows)
+
+        product_path = os.path.join(store_dir, "product_agg.parquet")
+        daily_path = os.path.join(store_dir, "daily_agg.parquet")
+
+        if os.path.exists(product_path):
+            delta_products = pd.concat([pd.read_parquet(product_path), delta_products])
+            delta_products = delta_products.groupby("Product", as_index=False).sum()
+        if os.path.exists(daily_path):
+            delta_daily = pd.concat([pd.read_parquet(daily_path), delta_daily])
+            delta_daily = delta_daily.groupby("Date", as_index=False)["Total_Sales"].sum()
+
+        _write_atomic(product_path, lambda path: delta_products.to_parquet(path, index=False))
+        _write_atomic(daily_path, lambda path: delta_daily.to_parquet(path, index=False))
+
+        meta["parts"] = part
+        meta["rows"] += stats["new_rows"]
+        meta["raw_rows"] += int(raw_rows if raw_rows is not None else len(df_delta))
+        meta["version"] = hashlib.sha256(f"{meta['version']}:{part}:{hashes[keep].sum()}".encode()).hexdigest()[:24]
+        _write_atomic(os.path.join(store_dir, "meta.json"), lambda path: _save_json(path, meta))
+
+    return stats
+
+
+def bulk_load(store_dir, chunks):
+    """
+    Fill an empty store from an iterable of (raw_row_count, cleaned_chunk),
+    e.g. a CSV cleaned chunk by chunk. Same result as append_delta per chunk,
+    but the cross-chunk de-duplication is done once at the end.
+
+    Steps:
+    1) Write each chunk as a part; spill (row hash, row number) records to
+       one file per hash bucket
+    2) Per bucket: sort the records, keep the first row of every hash and
+       write the bucket's index file
+    3) Rewrite only the parts that lost rows, taking those rows out of the aggregates
+
+    Every step is linear in the data (plus a sort per bucket), whatever the
+    number of chunks. Returns the store meta dict.
+    """
+
+    record = np.dtype([("hash", "<u8"), ("row", "<i8")])
+    spill_dir = os.path.join(store_dir, "spill")
+
+    with _store_lock(store_dir):
+        if read_store_meta(store_dir)["parts"]:
+            raise ValueError(f"bulk_load needs an empty store, {store_dir} already has parts")
+
+        os.makedirs(os.path.join(store_dir, "rows"), exist_ok=True)
+        os.makedirs(spill_dir, exist_ok=True)
+
+        meta = {"parts": 0, "rows": 0, "raw_rows": 0, "version": ""}
+        offsets = [0]
+        products = []
+        daily = []
+        digest = hashlib.sha256()
+
+        for raw_rows, chunk in chunks:
+            meta["raw_rows"] += int(raw_rows)
+            chunk = chunk[ROW_COLUMNS]
+            hashes = row_hashes(chunk)
+
+            _, first = np.unique(hashes, return_index=True)
+            first.sort()
+            chunk, hashes = chunk.iloc[first], hashes[first]
+            if chunk.empty:
+                continue
+
+            meta["parts"] += 1
+            part_path = os.path.join(store_dir, "rows", f"part-{meta['parts']:05d}.parquet")
+            _write_atomic(part_path, lambda path: chunk.to_parquet(path, index=False))
+
+            records = np.empty(len(hashes), dtype=record)
+            records["hash"] = hashes
+            records["row"] = offsets[-1] + np.arange(len(hashes))
+            for bucket, positions in _split_by_bucket(hashes):
+                with open(os.path.join(spill_dir, f"bucket-{bucket:03x}.bin"), "ab") as f:
+                    records[positions].tofile(f)
+
+            offsets.append(offsets[-1] + len(chunk))
+            products.append(_product_totals(chunk))
+            daily.append(_daily_totals(chunk))
+
+            # Keep the pending partial aggregates small
+            if len(products) > 32:
+                products = [pd.concat(products).groupby("Product", as_index=False).sum()]
+                daily = [_daily_totals(pd.concat(daily))]
+
+        # Cross-chunk duplicates: the first row number of each hash wins
+        os.makedirs(os.path.join(store_dir, "index"), exist_ok=True)
+        dropped = []
+        for name in sorted(os.listdir(spill_dir)):
+            records = np.fromfile(os.path.join(spill_dir, name), dtype=record)
+            records.sort(order=["hash", "row"])
+            repeat = np.zeros(len(records), dtype=bool)
+            repeat[1:] = records["hash"][1:] == records["hash"][:-1]
+            dropped.append(records["row"][repeat])
+
+            unique = records["hash"][~repeat]
+            digest.update(unique.tobytes())
+            bucket = int(name[len("bucket-"):-len(".bin")], 16)
+            _write_atomic(_bucket_path(store_dir, bucket), lambda path: _save_array(path, unique))
+        shutil.rmtree(spill_dir, ignore_errors=True)
+
+        dropped = np.sort(np.concatenate(dropped)) if dropped else np.empty(0, dtype=np.int64)
+        offsets = np.asarray(offsets)
+        parts_of_dropped = np.searchsorted(offsets, dropped, side="right") - 1
+
+        for part in np.unique(parts_of_dropped):
+            part_path = os.path.join(store_dir, "rows", f"part-{part + 1:05d}.parquet")
+            rows = pd.read_parquet(part_path)
+            drop = np.zeros(len(rows), dtype=bool)
+            drop[dropped[parts_of_dropped == part] - offsets[part]] = True
+
+            # Dropped rows equal rows kept elsewhere: subtract their totals
+            removed_products = _product_totals(rows[drop])
+            removed_products[["Total_Sales", "Total_Quantity", "Transaction_Count"]] *= -1
+            removed_daily = _daily_totals(rows[drop])
+            removed_daily["Total_Sales"] *= -1
+            products.append(removed_products)
+            daily.append(removed_daily)
+
+            kept = rows[~drop]
+            _write_atomic(part_path, lambda path: kept.to_parquet(path, index=False))
+
+        meta["rows"] = int(offsets[-1] - len(dropped))
+        meta["version"] = digest.hexdigest()[:24]
+
+        if meta["parts"]:
+            product_agg = pd.concat(products).groupby("Product", as_index=False).sum()
+            _write_atomic(
+                os.path.join(store_dir, "product_agg.parquet"),
+                lambda path: product_agg.to_parquet(path, index=False)
+            )
+            daily_agg = _daily_totals(pd.concat(daily))
+            _write_atomic(
+                os.path.join(store_dir, "daily_agg.parquet"),
+                lambda path: daily_agg.to_parquet(path, index=False)
+            )
+        _write_atomic(os.path.join(store_dir, "meta.json"), lambda path: _save_json(path, meta))
+
+    return meta
+
+
+def load_product_aggregates(store_dir):
+    """
+    Per-product aggregates in analysis.product_aggregates format
+    (feed to generate_summary / top_low_products / product_sales_summary via agg=).
+    """
+
+    agg = pd.read_parquet(os.path.join(store_dir, "product_agg.parquet"))
+    agg = agg.sort_values("Product").reset_index(drop=True)
+    agg["Transaction_Count"] = agg["Transaction_Count"].astype(np.int64)
+    return complete_product_aggregates(agg)
+
+
+def load_daily_sales(store_dir):
+    """
+    Daily sales trend (Date, Total_Sales), same as df.groupby("Date") in the app.
+    """
+
+    daily = pd.read_parquet(os.path.join(store_dir, "daily_agg.parquet"))
+    return daily.sort_values("Date").reset_index(drop=True)
+
+
+def load_store_rows(store_dir):
+    """
+    All stored cleaned rows (only for stages that need transactions, e.g. training).
+    """
+
+    meta = read_store_meta(store_dir)
+    parts = [
+        pd.read_parquet(os.path.join(store_dir, "rows", f"part-{part:05d}.parquet"))
+        for part in range(1, meta["parts"] + 1)
+    ]
+    if not parts:
+        return pd.DataFrame(columns=ROW_COLUMNS)
+
+    df = pd.concat(parts, ignore_index=True)
+    df["Product"] = df["Product"].astype("category")
+    return df
@@ -0,0 +1,221 @@
+"""
+Headless batch pipeline: mapper -> preprocess -> analysis -> forecasting -> report_pdf.
+
+Processes every CSV in a directory across a process pool and writes, per file:
+cleaned Parquet, summary JSON, product tables, forecast CSV and a PDF report,
+plus a run manifest with per-stage timings.
+
+    python batch.py data/stores --out output/nightly --mappings mappings.json --workers 4
+
+mappings.json maps a file name (or "default") to a column mapping, using the
+same keys as mapper.auto_detect_columns:
+
+    {"default": {"date": "Order Date", "product": "Item", "quantity": "Qty",
+                 "price": "Unit Price", "sales": null}}
+
+Files without a saved mapping fall back to auto-detection on their header.
+Streamlit is never imported here.
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+
+from analysis import analyze_sales
+from forecast_backends import BACKENDS, DEFAULT_BACKEND
+from forecasting import get_top_future_products, predict_product_future_sales, train_product_forecast_model
+from ingest import load_clean_streaming, read_csv_preview
+from mapper import auto_detect_columns
+from report_pdf import generate_pdf_report
+
+REQUIRED_ROLES = ["date", "product", "quantity", "price"]
+
+
+@contextmanager
+def _timed(timings, stage):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = round(time.perf_counter() - start, 4)
+
+
+def load_mappings(path):
+    if not path:
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def resolve_mapping(file_name, mappings, csv_path):
+    """
+    Saved mapping for this file, else the "default" one, else auto-detect.
+    """
+
+    mapping = mappings.get(file_name) or mappings.get("default")
+    if mapping is None:
+        with open(csv_path, "rb") as f:
+            preview, _ = read_csv_preview(f)
+        mapping = auto_detect_columns(preview.columns, preview)
+
+    missing = [role for role in REQUIRED_ROLES if not mapping.get(role)]
+    if missing:
+        raise ValueError(f"No column mapping for: {', '.join(missing)}")
+    return mapping
+
+
+def process_file(csv_path, mapping, out_dir, forecast_days=7, backend=DEFAULT_BACKEND, make_pdf=True,
+                 train_params=None):
+    """
+    Run the full pipeline for one CSV. Returns its manifest entry.
+
+    train_params are passed to the forecast backend (e.g. {"n_jobs": 1}).
+    """
+
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    file_dir = os.path.join(out_dir, name)
+    os.makedirs(file_dir, exist_ok=True)
+
+    timings = {}
+    outputs = {}
+    entry = {"file": csv_path, "mapping": mapping, "status": "ok", "timings": timings, "outputs": outputs}
+
+    try:
+        with _timed(timings, "read_clean"):
+            with open(csv_path, "rb") as f:
+                df_clean, raw_rows, encoding = load_clean_streaming(
+                    f, mapping["date"], mapping["product"], mapping["quantity"], mapping["price"],
+                    mapping.get("sales")
+                )
+        entry.update({"encoding": encoding, "raw_rows": raw_rows, "clean_rows": int(len(df_clean))})
+
+        if df_clean.empty:
+            raise ValueError("After cleaning dataset became empty. Please check the column mapping.")
+
+        with _timed(timings, "write_parquet"):
+            outputs["cleaned"] = os.path.join(file_dir, "cleaned.parquet")
+            df_clean.to_parquet(outputs["cleaned"], index=False)
+
+        with _timed(timings, "analysis"):
+            summary, top_df, low_df, product_summary = analyze_sales(df_clean)
+
+            outputs["summary"] = os.path.join(file_dir, "summary.json")
+            with open(outputs["summary"], "w") as f:
+                json.dump(summary, f, indent=2, default=str)
+
+            outputs["product_summary"] = os.path.join(file_dir, "product_summary.csv")
+            product_summary.to_csv(outputs["product_summary"], index=False)
+            outputs["top_products"] = os.path.join(file_dir, "top_products.csv")
+            top_df.to_csv(outputs["top_products"], index=False)
+            outputs["low_products"] = os.path.join(file_dir, "low_products.csv")
+            low_df.to_csv(outputs["low_products"], index=False)
+
+        future_df = None
+        if forecast_days > 0:
+            with _timed(timings, "train"):
+                model, le = train_product_forecast_model(df_clean, backend=backend, **(train_params or {}))
+
+            with _timed(timings, "predict"):
+                future_df = predict_product_future_sales(df_clean, model, le, forecast_days)
+                outputs["forecast"] = os.path.join(file_dir, "future_predictions.csv")
+                future_df.to_csv(outputs["forecast"], index=False)
+                outputs["top_future_products"] = os.path.join(file_dir, "top_future_products.csv")
+                get_top_future_products(future_df).to_csv(outputs["top_future_products"], index=False)
+
+        if make_pdf:
+            with _timed(timings, "pdf"):
+                outputs["report"] = generate_pdf_report(
+                    summary, top_df, low_df, future_df, filename=os.path.join(file_dir, "report.pdf"),
+                    product_summary=product_summary
+                )
+
+    except Exception as e:
+        entry["status"] = "failed"
+        entry["error"] = f"{type(e).__name__}: {e}"
+
+    timings["total"] = round(sum(v for k, v in timings.items() if k != "total"), 4)
+    return entry
+
+
+def run_batch(input_dir, out_dir, mappings=None, workers=None, forecast_days=7,
+              backend=DEFAULT_BACKEND, make_pdf=True):
+    """
+    Process every *.csv in input_dir in parallel and write manifest.json.
+
+    Returns the manifest dict.
+    """
+
+    mappings = mappings or {}
+    os.makedirs(out_dir, exist_ok=True)
+
+    started = time.time()
+    csv_files = sorted(
+        os.path.join(input_dir, name)
+        for name in os.listdir(input_dir)
+        if name.lower().endswith(".csv")
+    )
+
+    entries = []
+    jobs = []
+    for csv_path in csv_files:
+        try:
+            mapping = resolve_mapping(os.path.basename(csv_path), mappings, csv_path)
+        except Exception as e:
+            entries.append({"file": csv_path, "status": "failed", "error": f"{type(e).__name__}: {e}"})
+            continue
+        jobs.append((csv_path, mapping))
+
+    # Single-threaded trees per file when several files train at once:
+    # parallelism comes from the pool (as in train_sharded_forecast_models)
+    train_params = {"n_jobs": 1} if backend == "random_forest" and workers != 1 else {}
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(process_file, csv_path, mapping, out_dir, forecast_days, backend, make_pdf, train_params)
+            for csv_path, mapping in jobs
+        ]
+        for future in as_completed(futures):
+            entries.append(future.result())
+
+    entries.sort(key=lambda entry: entry["file"])
+    manifest = {
+        "input_dir": input_dir,
+        "out_dir": out_dir,
+        "started_at": started,
+        "wall_seconds": round(time.time() - started, 4),
+        "options": {"workers": workers, "forecast_days": forecast_days, "backend": backend, "pdf": make_pdf},
+        "files_ok": sum(entry["status"] == "ok" for entry in entries),
+        "files_failed": sum(entry["status"] != "ok" for entry in entries),
+        "files": entries,
+    }
+
+    with open(os.path.join(out_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2, default=str)
+
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the analyzer pipeline over a directory of CSV files.")
+    parser.add_argument("input_dir", help="Directory containing CSV files")
+    parser.add_argument("--out", required=True, help="Output directory")
+    parser.add_argument("--mappings", help="JSON file with saved column mappings")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--forecast-days", type=int, default=7, help="Forecast horizon, 0 to skip forecasting")
+    parser.add_argument("--backend", choices=list(BACKENDS), default=DEFAULT_BACKEND)
+    parser.add_argument("--no-pdf", action="store_true", help="Skip PDF reports")
+    args = parser.parse_args()
+
+    manifest = run_batch(
+        args.input_dir, args.out, load_mappings(args.mappings), args.workers,
+        args.forecast_days, args.backend, not args.no_pdf
+    )
+    print(f"Processed {len(manifest['files'])} files in {manifest['wall_seconds']}s "
+          f"({manifest['files_ok']} ok, {manifest['files_failed']} failed)")
+
+
+if __name__ == "__main__":
+    main()
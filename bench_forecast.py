@@ -0,0 +1,103 @@
+"""
+Benchmark the forecasting backends on synthetic sales data.
+
+Reports fit time, predict latency, model size and holdout accuracy per
+backend, to pick an engine per dataset size:
+
+    python bench_forecast.py --rows 200000 --products 500 --days 365
+"""
+
+import argparse
+import io
+import json
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from forecast_backends import BACKENDS
+from forecasting import FEATURE_COLUMNS, build_product_daily, predict_product_future_sales, train_product_forecast_model
+from synthetic_data import make_sales_data
+
+
+def model_size_bytes(model, le):
+    buffer = io.BytesIO()
+    joblib.dump((model, le), buffer)
+    return buffer.tell()
+
+
+def holdout_split(df, horizon):
+    """
+    Train on everything before the last `horizon` days, test on the rest.
+    """
+
+    cutoff = df["Date"].max() - pd.Timedelta(days=horizon)
+    return df[df["Date"] <= cutoff], cutoff
+
+
+def benchmark_backend(backend, df, horizon=14):
+    train_df, cutoff = holdout_split(df, horizon)
+
+    start = time.perf_counter()
+    model, le = train_product_forecast_model(train_df, backend=backend)
+    fit_seconds = time.perf_counter() - start
+
+    # Holdout rows, DayIndex continuing from the training history
+    full_daily = build_product_daily(df)
+    test = full_daily[(full_daily["Date"] > cutoff) & full_daily["Product"].isin(set(le.classes_))].copy()
+    test["Product_Encoded"] = le.transform(test["Product"])
+
+    preds = model.predict(test[FEATURE_COLUMNS]).clip(min=0)
+    actual = test["Total_Sales"].to_numpy()
+    mae = float(np.abs(preds - actual).mean()) if len(test) else float("nan")
+    wape = float(np.abs(preds - actual).sum() / actual.sum()) if len(test) else float("nan")
+
+    start = time.perf_counter()
+    future_df = predict_product_future_sales(train_df, model, le, horizon)
+    predict_all_seconds = time.perf_counter() - start
+
+    one_product = train_df["Product"].iloc[0]
+    start = time.perf_counter()
+    predict_product_future_sales(train_df, model, le, horizon, one_product)
+    predict_one_seconds = time.perf_counter() - start
+
+    return {
+        "backend": backend,
+        "train_rows": int(len(train_df)),
+        "fit_seconds": round(fit_seconds, 4),
+        "predict_all_ms": round(predict_all_seconds * 1000, 2),
+        "predict_all_rows": int(len(future_df)),
+        "predict_one_ms": round(predict_one_seconds * 1000, 2),
+        "model_size_mb": round(model_size_bytes(model, le) / 1024 ** 2, 3),
+        "holdout_mae": round(mae, 4),
+        "holdout_wape": round(wape, 4),
+    }
+
+
+def run_benchmark(rows=100_000, products=200, days=365, horizon=14, backends=None, seed=42):
+    df = make_sales_data(n_rows=rows, n_products=products, n_days=days, seed=seed)
+    return [benchmark_backend(backend, df, horizon) for backend in (backends or list(BACKENDS))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark forecasting backends on synthetic data.")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--horizon", type=int, default=14)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--backends", nargs="+", choices=list(BACKENDS), default=None)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.rows, args.products, args.days, args.horizon, args.backends, args.seed)
+    print(pd.DataFrame(results).to_string(index=False))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
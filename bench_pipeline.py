@@ -0,0 +1,164 @@
+"""
+Reproducible pipeline benchmarks on seeded synthetic sales data (CPU only, offline).
+
+Scenarios cover each stage: streaming CSV ingest, preprocess_data, the
+analysis aggregations, the daily trend groupby and batched forecasting.
+
+    python bench_pipeline.py --sizes 10k 1m --json results.json
+    python bench_pipeline.py --sizes 10k 1m --baseline results.json   # compare
+
+With --baseline, any scenario slower than baseline x --threshold is
+reported and the exit code is 1.
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+from analysis import analyze_sales
+from forecasting import predict_product_future_sales, train_product_forecast_model
+from ingest import load_clean_streaming
+from preprocess import preprocess_data
+from synthetic_data import make_raw_sales_data
+
+SIZES = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+
+# Data shape per size: (products, days)
+SHAPES = {"10k": (200, 365), "1m": (5_000, 730), "10m": (20_000, 1_095)}
+
+MAPPING = ("Order Date", "Item", "Qty", "Unit Price", None)
+
+
+def _best_of(fn, repeats):
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run_size(size, repeats=3, date_formats=("iso", "us", "text"), dirty_ratio=0.02,
+             forecast_days=14, seed=42):
+    n_rows = SIZES[size]
+    n_products, n_days = SHAPES[size]
+
+    raw = make_raw_sales_data(n_rows, n_products, n_days, date_formats=date_formats,
+                              dirty_ratio=dirty_ratio, seed=seed)
+    csv_bytes = raw.to_csv(index=False).encode("utf-8")
+    clean = preprocess_data(raw, *MAPPING)
+
+    # Fixed-cost model (trained once on a sample) so predict timing tracks
+    # the batching code, not model size
+    model, le = train_product_forecast_model(
+        clean.sample(min(len(clean), 50_000), random_state=seed), backend="hist_gradient_boosting"
+    )
+
+    scenarios = {
+        "ingest_streaming": lambda: load_clean_streaming(io.BytesIO(csv_bytes), *MAPPING),
+        "preprocess_data": lambda: preprocess_data(raw, *MAPPING),
+        "analysis": lambda: analyze_sales(clean),
+        "daily_trend": lambda: clean.groupby("Date")["Total_Sales"].sum(),
+        "predict_all_products": lambda: predict_product_future_sales(clean, model, le, forecast_days),
+    }
+
+    results = []
+    for name, fn in scenarios.items():
+        seconds = _best_of(fn, repeats)
+        results.append({
+            "scenario": name,
+            "size": size,
+            "rows": n_rows,
+            "seconds": round(seconds, 5),
+            "rows_per_second": round(n_rows / seconds, 1) if seconds else None,
+        })
+    return results
+
+
+def environment():
+    return {
+        "python": sys.version.split()[0],
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "scikit-learn": sklearn.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Return rows (scenario, size, baseline_s, current_s, ratio, regressed).
+    """
+
+    base = {(r["scenario"], r["size"]): r["seconds"] for r in baseline["results"]}
+    rows = []
+    for r in results:
+        key = (r["scenario"], r["size"])
+        if key not in base or not base[key]:
+            continue
+        ratio = r["seconds"] / base[key]
+        rows.append({
+            "scenario": r["scenario"],
+            "size": r["size"],
+            "baseline_seconds": base[key],
+            "seconds": r["seconds"],
+            "ratio": round(ratio, 3),
+            "regressed": ratio > threshold,
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the analyzer pipeline on synthetic data.")
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=["10k", "1m"])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--date-formats", nargs="+", default=["iso", "us", "text"])
+    parser.add_argument("--dirty-ratio", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    parser.add_argument("--baseline", help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Allowed slowdown ratio vs baseline")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        results.extend(run_size(size, args.repeats, tuple(args.date_formats), args.dirty_ratio, seed=args.seed))
+
+    report = {
+        "environment": environment(),
+        "options": {
+            "repeats": args.repeats,
+            "date_formats": args.date_formats,
+            "dirty_ratio": args.dirty_ratio,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    print(pd.DataFrame(results).to_string(index=False))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        comparison = compare(results, baseline, args.threshold)
+        print()
+        print(pd.DataFrame(comparison).to_string(index=False))
+        if any(row["regressed"] for row in comparison):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+
+from profiling import profiled
+
+MAX_CHART_POINTS = 1500
+CHART_DPI = 100
+MAX_CACHED_CHARTS = 64
+
+RESOLUTIONS = {"day": "D", "week": "W-MON", "month": "MS"}
+
+# Process-wide cache of rendered PNGs, keyed by dataset fingerprint + chart options
+_png_cache = OrderedDict()
+_png_lock = threading.Lock()
+
+
+def build_trend_series(daily_sales):
+    """
+    Pre-aggregate a daily (Date, Total_Sales) series at every resolution.
+
+    Returns {"day": frame, "week": frame, "month": frame}.
+    """
+
+    series = daily_sales.set_index("Date")["Total_Sales"].sort_index()
+
+    out = {}
+    for name, rule in RESOLUTIONS.items():
+        if name == "day":
+            resampled = series
+        else:
+            resampled = series.resample(rule, label="left", closed="left").sum()
+        out[name] = resampled.reset_index()
+    return out
+
+
+def cube_trend_series(cube):
+    """
+    Same as build_trend_series, read from a SalesCube's precomputed rollups
+    (periods without sales are left out instead of drawn as zero).
+    """
+
+    return {name: cube.period_totals(name) for name in RESOLUTIONS}
+
+
+def lttb(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets downsampling: keeps the visual shape of a
+    line with n_out points. x and y are numeric numpy arrays; returns indices.
+    """
+
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    prev = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean() if next_end > next_start else x[-1]
+        avg_y = y[next_start:next_end].mean() if next_end > next_start else y[-1]
+
+        bx, by = x[start:end], y[start:end]
+        area = np.abs((x[prev] - avg_x) * (by - y[prev]) - (x[prev] - bx) * (avg_y - y[prev]))
+        prev = start + int(np.argmax(area)) if len(area) else start
+        selected[i + 1] = prev
+
+    return selected
+
+
+def min_max_downsample(y, n_out):
+    """
+    Keep the min and max of each bucket (n_out // 2 buckets), so peaks and
+    dips always survive. Returns sorted indices.
+    """
+
+    n = len(y)
+    if n_out >= n or n_out < 2:
+        return np.arange(n)
+
+    edges = np.linspace(0, n, n_out // 2 + 1).astype(np.int64)
+    picks = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end > start:
+            chunk = y[start:end]
+            picks.extend([start + int(np.argmin(chunk)), start + int(np.argmax(chunk))])
+    return np.unique(picks)
+
+
+@profiled()
+def select_trend_points(trend_series, resolution="auto", max_points=MAX_CHART_POINTS, method="lttb"):
+    """
+    Pick the series to draw and cap it at max_points.
+
+    "auto" uses the finest resolution that fits the budget. If even the
+    chosen resolution is too long, it is downsampled (LTTB or min-max).
+    Returns (frame, resolution_used, downsampled).
+    """
+
+    if resolution == "auto":
+        resolution = next(
+            (name for name in RESOLUTIONS if len(trend_series[name]) <= max_points),
+            "month"
+        )
+
+    frame = trend_series[resolution]
+    if len(frame) <= max_points:
+        return frame, resolution, False
+
+    y = frame["Total_Sales"].to_numpy(dtype=np.float64)
+    if method == "minmax":
+        keep = min_max_downsample(y, max_points)
+    else:
+        x = frame["Date"].to_numpy().astype("datetime64[s]").astype(np.float64)
+        keep = lttb(x, y, max_points)
+    return frame.iloc[keep], resolution, True
+
+
+def forecast_chart_frame(future_df, top_n=5):
+    """
+    Wide (Date x Product) frame for the first top_n products, built with one
+    pivot instead of filtering future_df once per product.
+    """
+
+    products = future_df["Product"].unique()[:top_n]
+    subset = future_df[future_df["Product"].isin(products)]
+    wide = subset.pivot_table(index="Date", columns="Product", values="Predicted_Sales", aggfunc="sum")
+    return wide[list(products)]
+
+
+def _figure_png(fig):
+    buffer = BytesIO()
+    fig.savefig(buffer, format="png", dpi=CHART_DPI, bbox_inches="tight")
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+def cached_chart_png(cache_key, render):
+    """
+    PNG bytes for cache_key, rendering with render() -> Figure only on a miss.
+
+    Shared by all sessions of the process, LRU-bounded.
+    """
+
+    with _png_lock:
+        if cache_key in _png_cache:
+            _png_cache.move_to_end(cache_key)
+            return _png_cache[cache_key]
+
+    png = _figure_png(render())
+
+    with _png_lock:
+        _png_cache[cache_key] = png
+        while len(_png_cache) > MAX_CACHED_CHARTS:
+            _png_cache.popitem(last=False)
+    return png
+
+
+def trend_figure(frame, resolution):
+    fig, ax = plt.subplots(figsize=(10, 4))
+    ax.plot(frame["Date"], frame["Total_Sales"])
+    ax.set_title(f"Sales Trend ({resolution.title()})")
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Total Sales")
+    return fig
+
+
+def top_products_figure(top_df):
+    fig, ax = plt.subplots(figsize=(10, 4))
+    top_df.head(10).plot.bar(x="Product", y="Total_Sales", ax=ax)
+    ax.set_title("Top 10 Products by Sales")
+    ax.set_ylabel("Total Sales")
+    return fig
+
+
+def forecast_figure(wide):
+    fig, ax = plt.subplots(figsize=(10, 4))
+    for product in wide.columns:
+        ax.plot(wide.index, wide[product], label=product)
+
+    ax.set_title("Future Sales Prediction")
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Predicted Sales")
+    ax.legend()
+    return fig
+
@@ -0,0 +1,153 @@
+import hashlib
+import json
+import os
+import shutil
+import uuid
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+CACHE_DIR = os.path.join("cache", "datasets")
+MAX_CACHE_BYTES = 2 * 1024 ** 3
+
+# Bump when the cleaning rules change so old entries stop matching
+CACHE_VERSION = "3"
+
+
+def file_content_hash(file, block_size=1024 * 1024):
+    """
+    SHA-256 of a file-like object, read block by block (no full copy).
+    """
+
+    digest = hashlib.sha256()
+    file.seek(0)
+    for block in iter(lambda: file.read(block_size), b""):
+        digest.update(block)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def dataset_cache_key(content_hash, mapping):
+    """
+    Cache key = file bytes hash + column mapping + cleaning version.
+    """
+
+    payload = json.dumps({"file": content_hash, "mapping": list(mapping), "version": CACHE_VERSION})
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _entry_path(key, cache_dir):
+    return os.path.join(cache_dir, f"{key}.parquet")
+
+
+def load_cached_dataset(key, cache_dir=CACHE_DIR):
+    """
+    Return (df_clean, raw_row_count) for a cached entry, or None on a miss.
+
+    The Parquet file is memory-mapped, and its mtime is bumped so the
+    entry counts as recently used for LRU eviction.
+    """
+
+    path = _entry_path(key, cache_dir)
+    if not os.path.exists(path):
+        return None
+
+    try:
+        table = pq.read_table(path, memory_map=True)
+    except (OSError, pa.ArrowInvalid):
+        return None
+
+    os.utime(path)
+
+    metadata = table.schema.metadata or {}
+    raw_rows = int(metadata.get(b"raw_rows", table.num_rows))
+    return table.to_pandas(), raw_rows
+
+
+def store_cached_dataset(key, df, raw_rows, cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+    """
+    Write a cleaned frame to the cache, then evict old entries over the size limit.
+
+    Strings are dictionary-encoded by Parquet, so repeated product names are
+    stored once. The write goes to a temp file first so concurrent sessions
+    never read a half-written entry.
+    """
+
+    os.makedirs(cache_dir, exist_ok=True)
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[b"raw_rows"] = str(int(raw_rows)).encode("utf-8")
+    table = table.replace_schema_metadata(metadata)
+
+    path = _entry_path(key, cache_dir)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, path)
+
+    evict_cache(cache_dir, max_bytes)
+    return path
+
+
+def evict_cache(cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+    """
+    Delete least recently used entries until the cache fits in max_bytes.
+    """
+
+    if not os.path.isdir(cache_dir):
+        return
+
+    paths = [os.path.join(cache_dir, name) for name in os.listdir(cache_dir) if name.endswith(".parquet")]
+    evict_lru(paths, max_bytes)
+
+
+def disk_usage(path):
+    """
+    Size in bytes of a file, or of every file below a directory.
+    """
+
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+
+    total = 0
+    for root, _, names in os.walk(path):
+        for name in names:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except FileNotFoundError:
+                continue
+    return total
+
+
+def evict_lru(paths, max_bytes, keep=None):
+    """
+    Delete the least recently used of `paths` (files or directories, oldest
+    mtime first) until their total size fits in max_bytes.
+
+    `keep` counts toward the total but is never deleted. Shared by the
+    dataset, export, model and out-of-core caches.
+    """
+
+    entries = []
+    total = 0
+    for path in paths:
+        try:
+            mtime = os.stat(path).st_mtime
+            size = disk_usage(path)
+        except FileNotFoundError:
+            continue
+        total += size
+        if path != keep:
+            entries.append((mtime, size, path))
+
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        total -= size
@@ -0,0 +1,131 @@
+import gzip
+import io
+import os
+import re
+import threading
+import uuid
+
+import pyarrow as pa
+
+from dataset_cache import evict_lru
+
+EXPORT_DIR = os.path.join("cache", "exports")
+MAX_EXPORT_BYTES = 2 * 1024 ** 3
+CSV_CHUNK_ROWS = 250_000
+GZIP_LEVEL = 6
+
+# format -> (file extension, MIME type, compression codec)
+EXPORT_FORMATS = {
+    "parquet": (".parquet", "application/octet-stream", None),
+    "csv.gz": (".csv.gz", "application/gzip", "gzip"),
+    "csv.zst": (".csv.zst", "application/zstd", "zstd"),
+    "csv": (".csv", "text/csv", None),
+}
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def available_formats():
+    """
+    Export formats this pyarrow build can write (zstd is optional).
+    """
+
+    return [
+        fmt for fmt, (_, _, codec) in EXPORT_FORMATS.items()
+        if codec is None or pa.Codec.is_available(codec)
+    ]
+
+
+def export_path(fingerprint, name, fmt, export_dir=EXPORT_DIR):
+    extension = EXPORT_FORMATS[fmt][0]
+    safe = re.sub(r"[^A-Za-z0-9_.-]", "_", fingerprint)
+    return os.path.join(export_dir, safe, f"{name}{extension}")
+
+
+def export_file_name(name, fmt):
+    return f"{name}{EXPORT_FORMATS[fmt][0]}"
+
+
+def export_mime(fmt):
+    return EXPORT_FORMATS[fmt][1]
+
+
+def _key_lock(path):
+    with _locks_guard:
+        return _locks.setdefault(path, threading.Lock())
+
+
+def _open_csv_stream(path, codec):
+    if codec == "gzip":
+        # zlib level 6: several times faster than level 9 for ~5% larger files
+        return gzip.open(path, "wt", encoding="utf-8", newline="", compresslevel=GZIP_LEVEL)
+    if codec:
+        return io.TextIOWrapper(pa.CompressedOutputStream(path, codec), encoding="utf-8", newline="")
+    return open(path, "w", encoding="utf-8", newline="")
+
+
+def _write_csv(df, path, codec):
+    # Written in row chunks through a compressing stream, so the full CSV
+    # text never exists in memory. pandas formatting is kept (same file as
+    # df.to_csv(index=False), just compressed).
+    with _open_csv_stream(path, codec) as out:
+        for start in range(0, max(len(df), 1), CSV_CHUNK_ROWS):
+            df.iloc[start:start + CSV_CHUNK_ROWS].to_csv(out, index=False, header=start == 0)
+
+
+def ensure_export(fingerprint, name, fmt, get_frame, export_dir=EXPORT_DIR, max_bytes=MAX_EXPORT_BYTES):
+    """
+    Path of the `name` export of a dataset in format `fmt`, writing it on
+    first request only.
+
+    get_frame() is called only when the file does not exist yet. Concurrent
+    requests for the same file wait for one writer; the write goes to a temp
+    file first so nobody serves a half-written export.
+    """
+
+    path = export_path(fingerprint, name, fmt, export_dir)
+
+    with _key_lock(path):
+        if os.path.exists(path):
+            os.utime(path)
+            return path
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        df = get_frame()
+
+        if fmt == "parquet":
+            df.to_parquet(tmp_path, index=False)
+        else:
+            _write_csv(df, tmp_path, EXPORT_FORMATS[fmt][2])
+        os.replace(tmp_path, path)
+
+    evict_exports(export_dir, max_bytes, keep=path)
+    return path
+
+
+def read_export(fingerprint, name, fmt, get_frame, export_dir=EXPORT_DIR):
+    """
+    Bytes of the export (for deferred download buttons); the file is
+    closed before returning.
+    """
+
+    with open(ensure_export(fingerprint, name, fmt, get_frame, export_dir), "rb") as f:
+        return f.read()
+
+
+def evict_exports(export_dir=EXPORT_DIR, max_bytes=MAX_EXPORT_BYTES, keep=None):
+    """
+    Delete least recently used export files until the directory fits in max_bytes.
+    """
+
+    if not os.path.isdir(export_dir):
+        return
+
+    paths = [
+        os.path.join(root, name)
+        for root, _, names in os.walk(export_dir)
+        for name in names if not name.endswith(".tmp")
+    ]
+    evict_lru(paths, max_bytes, keep=keep)
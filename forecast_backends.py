@@ -0,0 +1,143 @@
+import numpy as np
+from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
+
+DEFAULT_BACKEND = "random_forest"
+
+
+class SeasonalBaseline:
+    """
+    Lightweight linear + weekday baseline, one fit per product.
+
+    prediction = product trend line over DayIndex
+                 + product weekday offset (weekday mean - product mean)
+
+    Only running sums are stored, so partial_fit() folds in new rows
+    exactly, in time proportional to the new rows.
+    Expects features in FEATURE_COLUMNS order:
+    DayIndex, DayOfWeek, Month, Product_Encoded.
+    """
+
+    def __init__(self):
+        self.global_mean_ = 0.0
+        self.n_seen_ = 0
+        self.stats_ = np.zeros((0, 5))       # n, sum_x, sum_y, sum_xx, sum_xy
+        self.dow_stats_ = np.zeros((0, 7, 2))  # n, sum_y per weekday
+
+    def _grow(self, n_products):
+        if n_products > len(self.stats_):
+            extra = n_products - len(self.stats_)
+            self.stats_ = np.vstack([self.stats_, np.zeros((extra, 5))])
+            self.dow_stats_ = np.concatenate([self.dow_stats_, np.zeros((extra, 7, 2))])
+
+    def fit(self, X, y):
+        self.global_mean_ = 0.0
+        self.n_seen_ = 0
+        self.stats_ = np.zeros((0, 5))
+        self.dow_stats_ = np.zeros((0, 7, 2))
+        return self.partial_fit(X, y)
+
+    def partial_fit(self, X, y):
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+
+        day = X[:, 0]
+        dow = X[:, 1].astype(np.int64)
+        product = X[:, 3].astype(np.int64)
+
+        n_products = int(product.max()) + 1 if len(product) else 0
+        self._grow(n_products)
+        size = len(self.stats_)
+
+        self.stats_[:, 0] += np.bincount(product, minlength=size)
+        self.stats_[:, 1] += np.bincount(product, weights=day, minlength=size)
+        self.stats_[:, 2] += np.bincount(product, weights=y, minlength=size)
+        self.stats_[:, 3] += np.bincount(product, weights=day * day, minlength=size)
+        self.stats_[:, 4] += np.bincount(product, weights=day * y, minlength=size)
+
+        cell = product * 7 + dow
+        self.dow_stats_[:, :, 0] += np.bincount(cell, minlength=size * 7).reshape(size, 7)
+        self.dow_stats_[:, :, 1] += np.bincount(cell, weights=y, minlength=size * 7).reshape(size, 7)
+
+        total = self.n_seen_ + len(y)
+        if total:
+            self.global_mean_ = (self.global_mean_ * self.n_seen_ + y.sum()) / total
+        self.n_seen_ = total
+        return self
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        day = X[:, 0]
+        dow = X[:, 1].astype(np.int64)
+        product = X[:, 3].astype(np.int64)
+
+        n, sx, sy, sxx, sxy = (self.stats_[:, i] for i in range(5))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean_x = np.where(n > 0, sx / n, 0.0)
+            mean_y = np.where(n > 0, sy / n, self.global_mean_)
+            var_x = sxx - n * mean_x * mean_x
+            slope = np.where(var_x > 1e-9, (sxy - n * mean_x * mean_y) / var_x, 0.0)
+
+            dow_n = self.dow_stats_[:, :, 0]
+            dow_mean = np.where(dow_n > 0, self.dow_stats_[:, :, 1] / dow_n, mean_y[:, None])
+            dow_offset = dow_mean - mean_y[:, None]
+
+        known = (product >= 0) & (product < len(n))
+        safe = np.where(known, product, 0)
+
+        preds = mean_y[safe] + slope[safe] * (day - mean_x[safe]) + dow_offset[safe, dow]
+        return np.where(known, preds, self.global_mean_)
+
+
+def _random_forest(**params):
+    options = {"n_estimators": 200, "random_state": 42, "n_jobs": -1}
+    options.update(params)
+    return RandomForestRegressor(**options)
+
+
+def _hist_gradient_boosting(**params):
+    options = {"max_iter": 300, "learning_rate": 0.1, "random_state": 42}
+    options.update(params)
+    return HistGradientBoostingRegressor(**options)
+
+
+def _seasonal_baseline(**params):
+    return SeasonalBaseline(**params)
+
+
+BACKENDS = {
+    "random_forest": _random_forest,
+    "hist_gradient_boosting": _hist_gradient_boosting,
+    "seasonal_baseline": _seasonal_baseline,
+}
+
+
+def make_forecast_model(backend=DEFAULT_BACKEND, **params):
+    """
+    Build an unfitted regressor for the given backend name.
+    """
+
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown forecast backend '{backend}'. Choose from: {', '.join(BACKENDS)}")
+    return BACKENDS[backend](**params)
+
+
+def extend_model(model, X, y, extra_rounds):
+    """
+    Fold new training rows into a fitted model without a full refit.
+
+    - partial_fit models (SeasonalBaseline): exact running-sum update
+    - RandomForest: warm_start grows extra_rounds new trees on the new rows
+    - HistGradientBoosting: warm_start adds extra_rounds boosting iterations
+    """
+
+    if hasattr(model, "partial_fit"):
+        return model.partial_fit(X, y)
+
+    if isinstance(model, RandomForestRegressor):
+        model.set_params(warm_start=True, n_estimators=model.n_estimators + extra_rounds)
+    elif isinstance(model, HistGradientBoostingRegressor):
+        model.set_params(warm_start=True, max_iter=model.max_iter + extra_rounds, early_stopping=False)
+    else:
+        raise ValueError("This model type does not support incremental updates. Please retrain it.")
+
+    return model.fit(X, y)
@@ -0,0 +1,415 @@
+"""
+Async HTTP forecast service over the model registry.
+
+    python forecast_service.py --port 8765 --registry models/registry
+
+    POST /forecast  {"model": "<registry key>", "products": ["SKU-1", "SKU-2"],
+                     "horizon": 14, "start_date": "2026-01-01"}
+    GET  /models    registered models
+    GET  /metrics   latency / throughput / batching / cache statistics
+    GET  /health
+
+"model" defaults to the newest registered model, "products" to every
+product the model knows, "start_date" (first forecast day) to tomorrow.
+
+Models are loaded once through model_registry.load_model (shared,
+memory-mapped). Requests that arrive within batch_window_ms of each other
+are answered by one model.predict call per model, and finished forecasts are
+cached per (model version, product, horizon, start date).
+
+Only the standard library is used for serving (asyncio streams, HTTP/1.0
+style: one request per connection). For tests, start_background_server()
+runs the service on a free local port in a background thread.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+import numpy as np
+import pandas as pd
+
+from forecasting import FEATURE_COLUMNS, ProductEncoder, finish_predictions, history_future_features
+from model_registry import REGISTRY_DIR, list_models, load_model, model_meta_path, read_model_meta
+
+BATCH_WINDOW_MS = 5
+MAX_CACHED_FORECASTS = 50_000
+MAX_HORIZON = 366
+LATENCY_SAMPLES = 10_000
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               409: "Conflict", 500: "Internal Server Error"}
+
+
+class ServiceError(Exception):
+    """
+    Request error with the HTTP status to answer with.
+    """
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ForecastService:
+    """
+    Model lookup, micro-batched prediction, forecast cache and metrics.
+
+    forecast() is a coroutine: concurrent calls for the same model are queued
+    for batch_window_ms and then predicted together in a worker thread, so
+    the event loop never blocks on model.predict.
+    """
+
+    def __init__(self, registry_dir=REGISTRY_DIR, batch_window_ms=BATCH_WINDOW_MS,
+                 max_cached=MAX_CACHED_FORECASTS):
+        self.registry_dir = registry_dir
+        self.batch_window = batch_window_ms / 1000
+        self.max_cached = max_cached
+
+        self.cache = OrderedDict()
+        self.pending = {}
+        self.versions = {}
+
+        self.started_at = time.time()
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+        self.counters = {
+            "requests": 0, "errors": 0, "cache_hits": 0, "cache_misses": 0,
+            "batches": 0, "batched_requests": 0, "predicted_rows": 0,
+        }
+
+    # ---------------- Models ----------------
+    def resolve_model(self, key=None):
+        """
+        (key, version, meta) of a registered model; version changes whenever
+        the key is re-registered, so cached forecasts never outlive a model.
+        """
+
+        if key is None:
+            models = list_models(self.registry_dir)
+            if not models:
+                raise ServiceError(404, "No registered models")
+            key = models[0]["key"]
+
+        try:
+            mtime = os.stat(model_meta_path(key, self.registry_dir)).st_mtime_ns
+        except (FileNotFoundError, OSError):
+            raise ServiceError(404, f"Unknown model '{key}'")
+
+        known = self.versions.get(key)
+        if known is None or known[0] != mtime:
+            meta = read_model_meta(key, self.registry_dir)
+            known = (mtime, f"{key}:{meta['created_at']}", meta)
+            self.versions[key] = known
+
+        return key, known[1], known[2]
+
+    # ---------------- Forecasts ----------------
+    async def forecast(self, key=None, products=None, horizon=7, start_date=None):
+        """
+        {product: (dates, predicted sales)} for the requested products.
+
+        Unknown products are reported under "skipped" instead of failing the request.
+        """
+
+        try:
+            horizon = int(horizon)
+        except (TypeError, ValueError):
+            horizon = 0
+        if not 1 <= horizon <= MAX_HORIZON:
+            raise ServiceError(400, f"horizon must be between 1 and {MAX_HORIZON}")
+
+        try:
+            start = pd.Timestamp(start_date).normalize() if start_date else \
+                pd.Timestamp.today().normalize() + pd.Timedelta(days=1)
+        except ValueError:
+            raise ServiceError(400, f"Invalid start_date '{start_date}'")
+
+        if products is not None and (
+            not isinstance(products, list) or any(isinstance(p, (list, dict)) for p in products)
+        ):
+            raise ServiceError(400, "products must be a list of product names")
+
+        key, version, meta = self.resolve_model(key)
+        known = set(meta["products"])
+        if products is None:
+            products = meta["products"]
+        products = list(dict.fromkeys(str(p) for p in products))
+
+        results = {}
+        missing = []
+        for product in products:
+            if product not in known:
+                continue
+            cached = self._cache_get((version, product, horizon, start))
+            if cached is None:
+                missing.append(product)
+            else:
+                results[product] = cached
+
+        if missing:
+            predicted = await self._enqueue(key, version, missing, horizon, start)
+            results.update(predicted)
+
+        dates = pd.date_range(start, periods=horizon).strftime("%Y-%m-%d").tolist()
+        return {
+            "model": key,
+            "version": version,
+            "start_date": dates[0],
+            "horizon": horizon,
+            "forecasts": [
+                {"product": product, "dates": dates, "predicted_sales": results[product].tolist()}
+                for product in products if product in results
+            ],
+            "skipped": [product for product in products if product not in results],
+        }
+
+    def _cache_get(self, cache_key):
+        if cache_key in self.cache:
+            self.cache.move_to_end(cache_key)
+            self.counters["cache_hits"] += 1
+            return self.cache[cache_key]
+        self.counters["cache_misses"] += 1
+        return None
+
+    def _cache_put(self, cache_key, values):
+        self.cache[cache_key] = values
+        while len(self.cache) > self.max_cached:
+            self.cache.popitem(last=False)
+
+    async def _enqueue(self, key, version, products, horizon, start):
+        # First request for a model opens a batch window; later ones join it
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        batch = self.pending.get(key)
+        if batch is None:
+            batch = self.pending[key] = []
+            loop.call_later(self.batch_window, lambda: asyncio.ensure_future(self._flush(key, version)))
+        batch.append((products, horizon, start, future))
+
+        return await future
+
+    async def _flush(self, key, version):
+        batch = self.pending.pop(key, [])
+        if not batch:
+            return
+
+        self.counters["batches"] += 1
+        self.counters["batched_requests"] += len(batch)
+
+        try:
+            loop = asyncio.get_running_loop()
+            preds = await loop.run_in_executor(None, self._predict_batch, key, batch)
+        except Exception as e:
+            for *_, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.counters["predicted_rows"] += sum(len(series) for values in preds for series in values.values())
+        for (products, horizon, start, future), values in zip(batch, preds):
+            for product, series in values.items():
+                self._cache_put((version, product, horizon, start), series)
+            if not future.done():
+                future.set_result(values)
+
+    def _predict_batch(self, key, batch):
+        """
+        One model.predict over the feature rows of every request in the batch.
+        Returns one {product: predictions} dict per request.
+        """
+
+        model, le = load_model(key, self.registry_dir)
+        if not isinstance(le, ProductEncoder):
+            raise ServiceError(409, "This model was saved without training history. Please retrain it.")
+
+        # Requests and metadata use str names; the encoder keeps the trained
+        # values (e.g. int SKUs read from an all-digit column)
+        originals = {str(c): c for c in le.classes_}
+
+        frames = []
+        for products, horizon, start, _ in batch:
+            trained = [originals[p] for p in products if p in originals]
+            frames.append(history_future_features(le, trained, horizon, start))
+
+        features = pd.concat(frames, ignore_index=True)
+        if features.empty:
+            return [{} for _ in batch]
+
+        predictions = finish_predictions(features, model.predict(features[FEATURE_COLUMNS]))
+
+        out = []
+        offset = 0
+        for frame, (products, horizon, _, _) in zip(frames, batch):
+            values = predictions["Predicted_Sales"].to_numpy()[offset:offset + len(frame)]
+            offset += len(frame)
+            names = frame["Product"].to_numpy()[::horizon]
+            out.append({str(name): values[i * horizon:(i + 1) * horizon] for i, name in enumerate(names)})
+        return out
+
+    # ---------------- Metrics ----------------
+    def record(self, seconds, ok=True):
+        self.counters["requests"] += 1
+        if not ok:
+            self.counters["errors"] += 1
+        self.latencies.append(seconds)
+
+    def metrics(self):
+        uptime = time.time() - self.started_at
+        latencies_ms = np.asarray(self.latencies, dtype=np.float64) * 1000
+        percentiles = (
+            dict(zip(["p50_ms", "p95_ms", "p99_ms"], np.percentile(latencies_ms, [50, 95, 99]).round(3).tolist()))
+            if len(latencies_ms) else {"p50_ms": None, "p95_ms": None, "p99_ms": None}
+        )
+        batches = self.counters["batches"]
+
+        return {
+            **self.counters,
+            **percentiles,
+            "uptime_seconds": round(uptime, 3),
+            "requests_per_second": round(self.counters["requests"] / uptime, 3) if uptime else 0.0,
+            "mean_batch_size": round(self.counters["batched_requests"] / batches, 3) if batches else 0.0,
+            "cached_forecasts": len(self.cache),
+        }
+
+    # ---------------- HTTP ----------------
+    async def route(self, method, path, body):
+        path = path.split("?", 1)[0].rstrip("/") or "/"
+
+        if path == "/health":
+            return {"status": "ok"}
+        if path == "/metrics":
+            return self.metrics()
+        if path == "/models":
+            return [
+                {k: meta[k] for k in ("key", "config", "date_min", "date_max", "created_at")}
+                | {"products": len(meta["products"])}
+                for meta in list_models(self.registry_dir)
+            ]
+        if path == "/forecast":
+            if method != "POST":
+                raise ServiceError(405, "Use POST /forecast")
+            try:
+                request = json.loads(body or b"{}")
+            except ValueError:
+                raise ServiceError(400, "Body must be JSON")
+            if not isinstance(request, dict):
+                raise ServiceError(400, "Body must be a JSON object")
+            return await self.forecast(
+                request.get("model"), request.get("products"),
+                request.get("horizon", 7), request.get("start_date")
+            )
+
+        raise ServiceError(404, f"No route {path}")
+
+    async def handle(self, reader, writer):
+        started = time.perf_counter()
+        status = 200
+        try:
+            request_line = (await reader.readline()).decode("latin1").split()
+            if len(request_line) < 2:
+                raise ServiceError(400, "Malformed request line")
+            method, path = request_line[0].upper(), request_line[1]
+
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            length = int(headers.get("content-length", 0) or 0)
+            body = await reader.readexactly(length) if length else b""
+
+            payload = await self.route(method, path, body)
+        except ServiceError as e:
+            status, payload = e.status, {"error": str(e)}
+        except Exception as e:
+            status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+
+        data = json.dumps(payload, default=str).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            "Connection: close\r\n\r\n"
+        )
+        try:
+            writer.write(head.encode("latin1") + data)
+            await writer.drain()
+        finally:
+            writer.close()
+            self.record(time.perf_counter() - started, ok=status == 200)
+
+
+async def start_server(service, host="127.0.0.1", port=8765):
+    return await asyncio.start_server(service.handle, host, port)
+
+
+def start_background_server(service, host="127.0.0.1", port=0):
+    """
+    Run the service on an event loop in a daemon thread (in-process tests,
+    notebooks). Returns (base_url, stop); port=0 picks a free port.
+    """
+
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+    holder = {}
+
+    def run():
+        asyncio.set_event_loop(loop)
+        holder["server"] = loop.run_until_complete(start_server(service, host, port))
+        ready.set()
+        loop.run_forever()
+
+    thread = threading.Thread(target=run, name="forecast-service", daemon=True)
+    thread.start()
+    ready.wait()
+
+    bound_host, bound_port = holder["server"].sockets[0].getsockname()[:2]
+
+    def stop():
+        async def close():
+            holder["server"].close()
+            await holder["server"].wait_closed()
+
+        asyncio.run_coroutine_threadsafe(close(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+    return f"http://{bound_host}:{bound_port}", stop
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve registered product forecast models over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--registry", default=REGISTRY_DIR, help="Model registry directory")
+    parser.add_argument("--window-ms", type=float, default=BATCH_WINDOW_MS,
+                        help="Micro-batching window for concurrent requests")
+    parser.add_argument("--cache-size", type=int, default=MAX_CACHED_FORECASTS,
+                        help="Cached (model, product, horizon, start date) forecasts")
+    args = parser.parse_args()
+
+    service = ForecastService(args.registry, args.window_ms, args.cache_size)
+
+    async def serve():
+        server = await start_server(service, args.host, args.port)
+        print(f"Forecast service on http://{args.host}:{args.port} (registry: {args.registry})")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
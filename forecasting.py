@@ -1,114 +1,332 @@
+import hashlib
+import json
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import joblib
+import numpy as np
 import pandas as pd
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.preprocessing import LabelEncoder
+
+from forecast_backends import DEFAULT_BACKEND, extend_model, make_forecast_model
+from profiling import profiled
+
+PREDICT_CHUNK_ROWS = 500_000
+
+
+FEATURE_COLUMNS = ["DayIndex", "DayOfWeek", "Month", "Product_Encoded"]
+UPDATE_EXTRA_TREES = 50
 
 
-def train_product_forecast_model(df):
+class ProductEncoder:
     """
-    Train ONE RandomForest model for product-wise forecasting.
+    LabelEncoder replacement whose codes never change.
 
-    Steps:
-    1) Group by Date + Product
-    2) Feature engineering (DayIndex, DayOfWeek, Month)
-    3) Encode Product using LabelEncoder
-    4) Train RandomForestRegressor
+    fit() sorts products like LabelEncoder, but extend() appends new products
+    at the end instead of re-sorting, so a trained model stays valid when new
+    products show up. It also remembers, per product, how many daily rows the
+    model was trained on and the last trained date, which is what incremental
+    updates need.
+    """
+
+    def __init__(self):
+        self.classes_ = np.array([], dtype=object)
+        self.seen_days_ = {}
+        self.last_date_ = {}
+
+    def fit(self, values):
+        self.classes_ = np.array(sorted(pd.unique(np.asarray(values, dtype=object))), dtype=object)
+        return self
+
+    def extend(self, values):
+        known = set(self.classes_)
+        new = [v for v in pd.unique(np.asarray(values, dtype=object)) if v not in known]
+        if new:
+            self.classes_ = np.concatenate([self.classes_, np.array(sorted(new), dtype=object)])
+        return self
+
+    def transform(self, values):
+        codes = pd.Categorical(np.asarray(values, dtype=object), categories=self.classes_).codes
+        if (codes < 0).any():
+            raise ValueError("y contains previously unseen labels")
+        return codes.astype(np.int64)
+
+    def fit_transform(self, values):
+        return self.fit(values).transform(values)
+
+    def inverse_transform(self, codes):
+        return self.classes_[np.asarray(codes)]
+
+    def reset_history(self):
+        """
+        Forget trained day counts / last dates (before recording a full-history rebuild).
+        """
+
+        self.seen_days_ = {}
+        self.last_date_ = {}
+        return self
+
+    def record_history(self, product_daily):
+        """
+        Remember trained day counts / last dates from a product_daily frame.
+
+        Counts add up across calls (incremental updates record only the delta).
+        """
+
+        grouped = product_daily.groupby("Product", observed=True)
+        for product, count in grouped.size().items():
+            self.seen_days_[product] = self.seen_days_.get(product, 0) + int(count)
+        for product, last in grouped["Date"].max().items():
+            self.last_date_[product] = last
+
+
+@profiled()
+def build_product_daily(df, day_offsets=None, cube=None):
+    """
+    Daily sales per product with forecast features.
+
+    DayIndex counts each product's sales days; day_offsets (product -> days
+    already seen) continues the count for incremental updates. Pass the
+    dataset's sales_cube.SalesCube to reuse its (day, product) cells
+    instead of grouping df again.
     """
 
     # Group by Date and Product (daily product sales)
-    product_daily = df.groupby(["Date", "Product"])["Total_Sales"].sum().reset_index()
+    if cube is not None:
+        product_daily = cube.product_daily()
+    else:
+        product_daily = df.groupby(["Date", "Product"], observed=True)["Total_Sales"].sum().reset_index()
+    product_daily["Product"] = product_daily["Product"].astype(object)
     product_daily = product_daily.sort_values(["Product", "Date"]).reset_index(drop=True)
 
     # Feature Engineering
     product_daily["DayIndex"] = product_daily.groupby("Product").cumcount()
+    if day_offsets:
+        product_daily["DayIndex"] += product_daily["Product"].map(day_offsets).fillna(0).astype(np.int64)
     product_daily["DayOfWeek"] = product_daily["Date"].dt.dayofweek
     product_daily["Month"] = product_daily["Date"].dt.month
 
+    return product_daily
+
+
+def _no_progress(fraction, message=None):
+    pass
+
+
+@profiled()
+def train_product_forecast_model(df, backend=DEFAULT_BACKEND, progress=None, cube=None, **params):
+    """
+    Train ONE model for product-wise forecasting.
+
+    Steps:
+    1) Group by Date + Product (or take the cells of a prebuilt SalesCube)
+    2) Feature engineering (DayIndex, DayOfWeek, Month)
+    3) Encode Product using ProductEncoder (stable codes)
+    4) Train the chosen backend (see forecast_backends.BACKENDS,
+       default RandomForestRegressor with 200 trees)
+
+    progress(fraction, message) is called between steps (background jobs).
+    """
+
+    progress = progress or _no_progress
+
+    progress(0.05, "Building daily product features")
+    product_daily = build_product_daily(df, cube=cube)
+
     # Encode Product
-    le = LabelEncoder()
+    progress(0.2, "Encoding products")
+    le = ProductEncoder()
     product_daily["Product_Encoded"] = le.fit_transform(product_daily["Product"])
+    le.record_history(product_daily)
 
     # Training data
-    X = product_daily[["DayIndex", "DayOfWeek", "Month", "Product_Encoded"]]
+    X = product_daily[FEATURE_COLUMNS]
     y = product_daily["Total_Sales"]
 
-    # Train model (faster + uses all CPU cores)
-    model = RandomForestRegressor(
-        n_estimators=200,
-        random_state=42,
-        n_jobs=-1
-    )
+    # Train model (default backend uses all CPU cores)
+    progress(0.3, f"Fitting {backend} on {len(X)} daily rows")
+    model = make_forecast_model(backend, **params)
     model.fit(X, y)
 
+    progress(1.0, "Model trained")
     return model, le
 
 
-def predict_product_future_sales(df, model, le, future_days, selected_product=None):
+def new_sales_rows(df, le):
+    """
+    Rows of df the model has not been trained on yet:
+    products it never saw, or dates after the product's last trained date.
     """
-    Predict future sales for:
-    - All products (if selected_product is None)
-    - OR a single product (if selected_product is given)
 
-    IMPORTANT:
-    - Future dates start from TOMORROW (real-time date)
-    - Predicted sales are rounded to 2 decimals
-    - Negative predictions are clipped to 0
-    - Unseen products are skipped safely
+    last_dates = pd.Series(le.last_date_, dtype="datetime64[ns]")
+    last_seen = last_dates.reindex(np.asarray(df["Product"], dtype=object)).to_numpy()
+
+    is_new = pd.isna(last_seen) | (df["Date"].to_numpy() > last_seen)
+    return df[is_new]
+
+
+@profiled()
+def update_product_forecast_model(model, le, df, extra_trees=UPDATE_EXTRA_TREES):
+    """
+    Incremental training: fit only the data the model has not seen.
+
+    Steps:
+    1) Keep rows with new products or dates after the last trained date
+    2) Continue each product's DayIndex from where training stopped
+    3) Append new products to the encoder (existing codes unchanged)
+    4) Fold the new rows into the model (forecast_backends.extend_model):
+       extra trees / boosting rounds via warm_start, or partial_fit
+
+    Cost follows the new rows, not the full history.
+    Returns (model, le, new_daily_rows).
+    """
+
+    if not isinstance(le, ProductEncoder):
+        raise ValueError("This model was saved without training history. Please retrain it.")
+
+    delta = new_sales_rows(df, le)
+    if delta.empty:
+        return model, le, 0
+
+    product_daily = build_product_daily(delta, day_offsets=le.seen_days_)
+
+    le.extend(product_daily["Product"])
+    product_daily["Product_Encoded"] = le.transform(product_daily["Product"])
+
+    model = extend_model(model, product_daily[FEATURE_COLUMNS], product_daily["Total_Sales"], extra_trees)
+
+    le.record_history(product_daily)
+    return model, le, len(product_daily)
+
+
+def _future_dates(future_days, start_date=None):
+    # Real-time start date (tomorrow onwards) unless a first forecast day is given
+    if start_date is None:
+        start_date = pd.Timestamp.today().normalize() + pd.Timedelta(days=1)
+    return pd.date_range(pd.Timestamp(start_date).normalize(), periods=future_days)
+
+
+def _future_frame(le, products, last_index, future_dates):
+    """
+    Feature rows for products x future_dates; last_index[i] is the next
+    DayIndex of products[i].
+    """
+
+    product_values = np.empty(len(products), dtype=object)
+    product_values[:] = products
+    future_days = len(future_dates)
+
+    n_products = len(products)
+    future_df = pd.DataFrame({
+        "Date": np.tile(future_dates.to_numpy(), n_products),
+        "Product": np.repeat(product_values, future_days),
+    })
+    future_df["DayIndex"] = np.repeat(np.asarray(last_index), future_days) + np.tile(np.arange(future_days), n_products)
+    future_df["DayOfWeek"] = np.tile(future_dates.dayofweek.to_numpy(), n_products)
+    future_df["Month"] = np.tile(future_dates.month.to_numpy(), n_products)
+    future_df["Product_Encoded"] = np.repeat(le.transform(product_values), future_days)
+
+    return future_df
+
+
+@profiled()
+def build_future_features(df, le, future_days, selected_product=None, start_date=None):
+    """
+    Feature matrix for all requested products x future days.
+
+    Last DayIndex per product comes from one groupby. Unseen products (and
+    products without data) are skipped. Returns an empty frame if nothing
+    is left to predict. start_date is the first forecast day (default: tomorrow).
     """
 
     products = df["Product"].unique() if selected_product is None else [selected_product]
-    all_predictions = []
 
     # Encoder known products
     encoder_products = set(le.classes_)
 
-    # Real-time start date (tomorrow onwards)
-    start_date = pd.Timestamp.today().normalize()
-    future_dates = pd.date_range(start_date + pd.Timedelta(days=1), periods=future_days)
+    future_dates = _future_dates(future_days, start_date)
 
-    for product in products:
-        # Skip unseen products to avoid error
-        if product not in encoder_products:
-            continue
+    # Number of sales days per product = next DayIndex
+    day_counts = df.groupby("Product", observed=True)["Date"].nunique()
+    day_counts = day_counts[day_counts > 0]
 
-        product_data = df[df["Product"] == product]
-        if product_data.empty:
-            continue
+    # Skip unseen products (and products without data) to avoid errors
+    products = [p for p in products if p in encoder_products and p in day_counts.index]
+    if not products:
+        return pd.DataFrame(columns=["Date", "Product"] + FEATURE_COLUMNS)
 
-        # Daily sales for this product (for DayIndex)
-        daily = product_data.groupby("Date")["Total_Sales"].sum().reset_index()
-        daily = daily.sort_values("Date").reset_index(drop=True)
+    return _future_frame(le, products, day_counts.loc[products].to_numpy(), future_dates)
 
-        last_index = len(daily)
-        future_index = list(range(last_index, last_index + future_days))
 
-        # Create future dataframe
-        future_df = pd.DataFrame({
-            "Date": future_dates,
-            "Product": product
-        })
+def history_future_features(le, products, future_days, start_date=None):
+    """
+    Same features as build_future_features, without the dataset: the next
+    DayIndex comes from the encoder's training history (ProductEncoder.seen_days_),
+    so persisted models can forecast on their own (forecast_service).
+    Products the model was not trained on are skipped.
+    """
 
-        # Feature engineering for future dates
-        future_df["DayIndex"] = future_index
-        future_df["DayOfWeek"] = future_df["Date"].dt.dayofweek
-        future_df["Month"] = future_df["Date"].dt.month
-        future_df["Product_Encoded"] = le.transform([product] * len(future_df))
+    products = [p for p in products if le.seen_days_.get(p, 0) > 0]
+    if not products:
+        return pd.DataFrame(columns=["Date", "Product"] + FEATURE_COLUMNS)
 
-        # Predict
-        preds = model.predict(future_df[["DayIndex", "DayOfWeek", "Month", "Product_Encoded"]])
+    last_index = [le.seen_days_[p] for p in products]
+    return _future_frame(le, products, last_index, _future_dates(future_days, start_date))
 
-        # ✅ Make predicted values understandable
-        future_df["Predicted_Sales"] = preds.round(2)
 
-        # ✅ Remove negative predictions (sales can't be negative)
-        future_df["Predicted_Sales"] = future_df["Predicted_Sales"].clip(lower=0)
+def _predict_in_chunks(model, features, chunk_rows=PREDICT_CHUNK_ROWS, progress=None):
+    progress = progress or _no_progress
 
-        all_predictions.append(future_df[["Date", "Product", "Predicted_Sales"]])
+    parts = []
+    for i in range(0, len(features), chunk_rows):
+        parts.append(model.predict(features.iloc[i:i + chunk_rows]))
+        progress(min(i + chunk_rows, len(features)) / len(features), "Predicting")
+    return np.concatenate(parts)
 
-    if all_predictions:
-        return pd.concat(all_predictions, ignore_index=True)
-    else:
+
+def finish_predictions(future_df, preds):
+    """
+    Attach rounded, non-negative predictions to a future feature frame and
+    return (Date, Product, Predicted_Sales).
+    """
+
+    # ✅ Make predicted values understandable
+    future_df["Predicted_Sales"] = np.asarray(preds).round(2)
+
+    # ✅ Remove negative predictions (sales can't be negative)
+    future_df["Predicted_Sales"] = future_df["Predicted_Sales"].clip(lower=0)
+
+    return future_df[["Date", "Product", "Predicted_Sales"]]
+
+
+@profiled()
+def predict_product_future_sales(df, model, le, future_days, selected_product=None,
+                                 chunk_rows=PREDICT_CHUNK_ROWS, progress=None, start_date=None):
+    """
+    Predict future sales for:
+    - All products (if selected_product is None)
+    - OR a single product (if selected_product is given)
+
+    IMPORTANT:
+    - Future dates start from TOMORROW (real-time date), or from start_date
+    - Predicted sales are rounded to 2 decimals
+    - Negative predictions are clipped to 0
+    - Unseen products are skipped safely
+
+    All products are predicted together: one feature matrix
+    (products x days) goes to model.predict in chunks of chunk_rows
+    (progress is reported after each chunk).
+    """
+
+    future_df = build_future_features(df, le, future_days, selected_product, start_date)
+    if future_df.empty:
         return pd.DataFrame(columns=["Date", "Product", "Predicted_Sales"])
 
+    # Predict (chunked to bound memory on huge catalogs)
+    preds = _predict_in_chunks(model, future_df[FEATURE_COLUMNS], chunk_rows, progress)
+    return finish_predictions(future_df, preds)
+
 
 def get_top_future_products(pred_df, n=10):
     """
@@ -128,3 +346,190 @@ def get_top_future_products(pred_df, n=10):
 
     top_products.columns = ["Product", "Total_Predicted_Sales"]
     return top_products
+
+
+# ---------------- SHARDED MODE ----------------
+# Products are split into shards by a stable hash of the product name, one
+# model per shard. Shards train in parallel worker processes that read the
+# training matrix from shared memory, and retraining skips any shard whose
+# data did not change.
+
+SHARD_INDEX_FILE = "shard_index.json"
+SHARD_ENCODER_FILE = "encoder.joblib"
+
+
+def product_shard(product, n_shards):
+    """
+    Stable shard id for a product (same across runs and processes).
+    """
+
+    return zlib.crc32(str(product).encode("utf-8")) % n_shards
+
+
+def load_shard_index(model_dir):
+    path = os.path.join(model_dir, SHARD_INDEX_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def _fit_shard(shm_name, shape, start, end, backend, params, path):
+    # Runs in a worker process: attach to the shared training matrix,
+    # copy only this shard's rows, fit and save.
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        data = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        X = pd.DataFrame(data[start:end, :-1], columns=FEATURE_COLUMNS)
+        y = data[start:end, -1].copy()
+    finally:
+        shm.close()
+
+    model = make_forecast_model(backend, **params)
+    model.fit(X, y)
+    joblib.dump(model, path)
+    return path
+
+
+@profiled()
+def train_sharded_forecast_models(df, model_dir, n_shards=8, backend=DEFAULT_BACKEND,
+                                  max_workers=None, **params):
+    """
+    Train one model per product shard in a process pool.
+
+    Steps:
+    1) Build daily product features once (codes stay stable across runs:
+       an existing shard encoder is extended, not refit)
+    2) Sort rows by shard and copy the matrix into shared memory
+    3) Fingerprint each shard's rows; unchanged shards are skipped
+    4) Fit changed shards in parallel and save them + shard_index.json
+
+    Returns the shard index dict.
+    """
+
+    os.makedirs(model_dir, exist_ok=True)
+    old_index = load_shard_index(model_dir)
+    encoder_path = os.path.join(model_dir, SHARD_ENCODER_FILE)
+
+    compatible = (
+        old_index is not None
+        and old_index["n_shards"] == n_shards
+        and old_index["backend"] == backend
+        and old_index["params"] == params
+        and os.path.exists(encoder_path)
+    )
+    if not compatible:
+        old_index = None
+
+    product_daily = build_product_daily(df)
+
+    le = joblib.load(encoder_path) if old_index else ProductEncoder()
+    if old_index:
+        le.extend(product_daily["Product"])
+    else:
+        le.fit(product_daily["Product"])
+    product_daily["Product_Encoded"] = le.transform(product_daily["Product"])
+    # product_daily is the full history, so it replaces the recorded one
+    le.reset_history().record_history(product_daily)
+
+    product_to_shard = {p: product_shard(p, n_shards) for p in le.classes_}
+    product_daily["Shard"] = product_daily["Product"].map(product_to_shard)
+    product_daily = product_daily.sort_values("Shard", kind="stable").reset_index(drop=True)
+
+    data = np.column_stack([
+        product_daily[FEATURE_COLUMNS].to_numpy(dtype=np.float64),
+        product_daily["Total_Sales"].to_numpy(dtype=np.float64),
+    ])
+    bounds = np.searchsorted(product_daily["Shard"].to_numpy(), np.arange(n_shards + 1))
+
+    # Single-threaded trees per shard: parallelism comes from the pool
+    worker_params = dict(params)
+    if backend == "random_forest":
+        worker_params.setdefault("n_jobs", 1)
+
+    shards = {}
+    to_train = []
+    for shard in range(n_shards):
+        start, end = int(bounds[shard]), int(bounds[shard + 1])
+        if start == end:
+            continue
+
+        fingerprint = hashlib.sha256(data[start:end].tobytes()).hexdigest()
+        filename = f"shard_{shard:04d}.joblib"
+        shards[str(shard)] = {
+            "file": filename,
+            "fingerprint": fingerprint,
+            "rows": end - start,
+            "products": sorted(product_daily["Product"].iloc[start:end].unique().tolist()),
+        }
+
+        old = (old_index or {}).get("shards", {}).get(str(shard))
+        unchanged = old and old["fingerprint"] == fingerprint and os.path.exists(os.path.join(model_dir, filename))
+        if not unchanged:
+            to_train.append((shard, start, end, os.path.join(model_dir, filename)))
+
+    if to_train:
+        shm = shared_memory.SharedMemory(create=True, size=max(data.nbytes, 1))
+        try:
+            np.ndarray(data.shape, dtype=np.float64, buffer=shm.buf)[:] = data
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                futures = [
+                    pool.submit(_fit_shard, shm.name, data.shape, start, end, backend, worker_params, path)
+                    for _, start, end, path in to_train
+                ]
+                for future in futures:
+                    future.result()
+        finally:
+            shm.close()
+            shm.unlink()
+
+    joblib.dump(le, encoder_path)
+
+    index = {
+        "n_shards": n_shards,
+        "backend": backend,
+        "params": params,
+        "encoder": SHARD_ENCODER_FILE,
+        "trained_shards": [shard for shard, _, _, _ in to_train],
+        "shards": shards,
+    }
+    with open(os.path.join(model_dir, SHARD_INDEX_FILE), "w") as f:
+        json.dump(index, f, indent=2)
+
+    return index
+
+
+@profiled()
+def predict_sharded_future_sales(df, model_dir, future_days, selected_product=None,
+                                 chunk_rows=PREDICT_CHUNK_ROWS, start_date=None):
+    """
+    Same output as predict_product_future_sales, using sharded models.
+
+    Only the shards that hold the requested products are loaded.
+    """
+
+    index = load_shard_index(model_dir)
+    if index is None:
+        raise ValueError("No sharded models found. Please train them first.")
+
+    le = joblib.load(os.path.join(model_dir, index["encoder"]))
+
+    future_df = build_future_features(df, le, future_days, selected_product, start_date)
+    if future_df.empty:
+        return pd.DataFrame(columns=["Date", "Product", "Predicted_Sales"])
+
+    n_shards = index["n_shards"]
+    shard_ids = future_df["Product"].map(lambda p: product_shard(p, n_shards)).to_numpy()
+
+    preds = np.full(len(future_df), np.nan)
+    for shard in np.unique(shard_ids):
+        entry = index["shards"].get(str(shard))
+        if entry is None:
+            continue
+
+        rows = np.flatnonzero(shard_ids == shard)
+        model = joblib.load(os.path.join(model_dir, entry["file"]))
+        preds[rows] = _predict_in_chunks(model, future_df.iloc[rows][FEATURE_COLUMNS], chunk_rows)
+
+    future_df = future_df[~np.isnan(preds)].copy()
+    return finish_predictions(future_df, preds[~np.isnan(preds)])
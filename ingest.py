@@ -0,0 +1,142 @@
+import shutil
+
+import chardet
+import pandas as pd
+
+from append_store import bulk_load
+from preprocess import clean_chunk, compact_frame
+from profiling import profiled
+
+ENCODING_PROBE_BYTES = 64 * 1024
+FALLBACK_ENCODINGS = ["utf-8", "latin1", "cp1252"]
+DEFAULT_CHUNK_ROWS = 200_000
+
+
+@profiled()
+def detect_encoding(file, probe_bytes=ENCODING_PROBE_BYTES):
+    """
+    Guess the encoding from a bounded prefix instead of the whole file.
+    """
+
+    file.seek(0)
+    prefix = file.read(probe_bytes)
+    file.seek(0)
+
+    detected = chardet.detect(prefix)
+    return detected.get("encoding") or "utf-8"
+
+
+def _candidate_encodings(file):
+    first = detect_encoding(file)
+    return [first] + [enc for enc in FALLBACK_ENCODINGS if enc.lower() != first.lower()]
+
+
+def read_csv_preview(file, nrows=1000):
+    """
+    Read only the first rows of a CSV (for previews and column mapping).
+
+    Returns (preview_df, encoding).
+    """
+
+    for enc in _candidate_encodings(file):
+        try:
+            file.seek(0)
+            df = pd.read_csv(file, encoding=enc, nrows=nrows)
+            return df, enc
+        except Exception:
+            continue
+        finally:
+            file.seek(0)
+
+    raise ValueError("Could not read this CSV file. Please re-save as UTF-8 or try another dataset.")
+
+
+def _iter_clean_chunks(file, encoding, mapping, chunksize):
+    # Yields (raw_row_count, cleaned_chunk) for each block of the CSV
+    date_col, product_col, qty_col, price_col, sales_col = mapping
+
+    usecols = [date_col, product_col, qty_col, price_col] + ([sales_col] if sales_col else [])
+    usecols = list(dict.fromkeys(usecols))
+
+    file.seek(0)
+    reader = pd.read_csv(file, encoding=encoding, usecols=usecols, chunksize=chunksize)
+    for chunk in reader:
+        part = clean_chunk(chunk, date_col, product_col, qty_col, price_col, sales_col)
+
+        # Cheap local de-dup keeps the pending list small
+        yield len(chunk), part.drop_duplicates()
+
+
+def _stream_clean(file, encoding, mapping, chunksize):
+    cleaned = []
+    raw_rows = 0
+
+    for chunk_rows, part in _iter_clean_chunks(file, encoding, mapping, chunksize):
+        raw_rows += chunk_rows
+        cleaned.append(part)
+
+    if cleaned:
+        df = pd.concat(cleaned, ignore_index=True)
+    else:
+        columns = ["Date", "Product", "Quantity", "Price", "Total_Sales"]
+        df = pd.DataFrame(columns=columns)
+
+    df.drop_duplicates(inplace=True)
+    return compact_frame(df), raw_rows
+
+
+@profiled()
+def load_clean_streaming(file, date_col, product_col, qty_col, price_col, sales_col=None,
+                         chunksize=DEFAULT_CHUNK_ROWS):
+    """
+    Chunked alternative to read_csv_safely + preprocess_data for big uploads.
+
+    Steps:
+    1) Detect encoding from a bounded prefix
+    2) Read only the mapped columns, chunk by chunk
+    3) Clean each chunk (same rules as preprocess_data)
+    4) Concatenate cleaned chunks and de-duplicate once
+
+    Peak memory follows the cleaned output, not the raw file.
+    Returns (df_clean, raw_row_count, encoding).
+    """
+
+    mapping = (date_col, product_col, qty_col, price_col, sales_col)
+
+    for enc in _candidate_encodings(file):
+        try:
+            df, raw_rows = _stream_clean(file, enc, mapping, chunksize)
+            return df, raw_rows, enc
+        except UnicodeDecodeError:
+            continue
+        finally:
+            file.seek(0)
+
+    raise ValueError("Could not read this CSV file. Please re-save as UTF-8 or try another dataset.")
+
+
+@profiled(rows_from=None)
+def stream_clean_to_store(file, store_dir, date_col, product_col, qty_col, price_col, sales_col=None,
+                          chunksize=DEFAULT_CHUNK_ROWS):
+    """
+    Out-of-core ingest: clean the CSV chunk by chunk straight into an
+    append_store directory (Parquet parts, de-duplicated across chunks once
+    at the end by append_store.bulk_load). Nothing bigger than one chunk is
+    held in memory.
+
+    Returns (store_dir, raw_row_count, encoding).
+    """
+
+    mapping = (date_col, product_col, qty_col, price_col, sales_col)
+
+    for enc in _candidate_encodings(file):
+        shutil.rmtree(store_dir, ignore_errors=True)
+        try:
+            meta = bulk_load(store_dir, _iter_clean_chunks(file, enc, mapping, chunksize))
+            return store_dir, meta["raw_rows"], enc
+        except UnicodeDecodeError:
+            continue
+        finally:
+            file.seek(0)
+
+    raise ValueError("Could not read this CSV file. Please re-save as UTF-8 or try another dataset.")
@@ -0,0 +1,155 @@
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+
+MAX_JOB_WORKERS = 2
+MAX_FINISHED_JOBS = 50
+
+
+class LocalExecutor:
+    """
+    Executor that runs each job inline inside submit().
+
+    Same interface as concurrent.futures executors, for deterministic tests
+    and scripts that do not want background threads.
+    """
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        future.set_running_or_notify_cancel()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+    def shutdown(self, wait=True):
+        pass
+
+
+class Job:
+    """
+    One submitted unit of work and its progress.
+
+    status: queued -> running -> done | failed
+    """
+
+    def __init__(self, key, name):
+        self.id = uuid.uuid4().hex[:12]
+        self.key = key
+        self.name = name
+        self.status = "queued"
+        self.progress = 0.0
+        self.message = "Queued"
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def active(self):
+        return self.status in ("queued", "running")
+
+    def report(self, progress, message=None):
+        """
+        Progress callback handed to the job function (0.0 - 1.0).
+        """
+
+        self.progress = max(0.0, min(1.0, float(progress)))
+        if message:
+            self.message = message
+
+    def snapshot(self):
+        return {
+            "id": self.id,
+            "key": self.key,
+            "name": self.name,
+            "status": self.status,
+            "progress": self.progress,
+            "message": self.message,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobManager:
+    """
+    Bounded background job pool with progress and de-duplication.
+
+    submit() returns a job id right away. A job with the same key
+    (e.g. "train:<dataset fingerprint>:<backend>") that is still queued or
+    running is reused instead of starting a duplicate. The UI polls
+    get()/snapshot() for status.
+
+    Pass executor=LocalExecutor() to run jobs inline (tests).
+    """
+
+    def __init__(self, executor=None, max_workers=MAX_JOB_WORKERS, max_finished=MAX_FINISHED_JOBS):
+        self.executor = executor or ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self.max_finished = max_finished
+        self.jobs = {}
+        self.active_by_key = {}
+        self.lock = threading.Lock()
+
+    def submit(self, key, fn, *args, name=None, **kwargs):
+        """
+        Schedule fn(*args, progress=job.report, **kwargs) and return the job id.
+        """
+
+        with self.lock:
+            existing = self.active_by_key.get(key)
+            if existing is not None and self.jobs[existing].active:
+                return existing
+
+            job = Job(key, name or key)
+            self.jobs[job.id] = job
+            self.active_by_key[key] = job.id
+            self._prune()
+
+        self.executor.submit(self._run, job, fn, args, kwargs)
+        return job.id
+
+    def _run(self, job, fn, args, kwargs):
+        job.status = "running"
+        job.started_at = time.time()
+        job.message = "Running"
+        try:
+            job.result = fn(*args, progress=job.report, **kwargs)
+            job.progress = 1.0
+            job.status = "done"
+            job.message = "Done"
+        except Exception as e:
+            job.error = str(e)
+            job.status = "failed"
+            job.message = "Failed"
+        finally:
+            job.finished_at = time.time()
+            with self.lock:
+                if self.active_by_key.get(job.key) == job.id:
+                    del self.active_by_key[job.key]
+
+    def _prune(self):
+        finished = sorted(
+            (job for job in self.jobs.values() if not job.active),
+            key=lambda job: job.finished_at or 0
+        )
+        for job in finished[:max(0, len(finished) - self.max_finished)]:
+            del self.jobs[job.id]
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def snapshot(self, job_id):
+        job = self.get(job_id)
+        return job.snapshot() if job else None
+
+    def list_jobs(self):
+        with self.lock:
+            return [job.snapshot() for job in self.jobs.values()]
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
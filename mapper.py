@@ -1,24 +1,178 @@
-def auto_detect_columns(columns):
-    def find_col(keywords):
-        for c in columns:
-            low = c.lower()
-            for k in keywords:
-                if k in low:
-                    return c
-        return None
-
-    date_col = find_col(["date", "order_date", "invoice_date", "time"])
-    product_col = find_col(["product", "item", "name", "sku"])
-    quantity_col = find_col(["qty", "quantity", "units", "count"])
-    price_col = find_col(["price", "unit_price", "cost"])
-    sales_col = find_col(["total_sales", "sales", "amount", "revenue", "total"])
+import re
+
+import numpy as np
+import pandas as pd
+
+from preprocess import infer_date_formats
+
+PROFILE_SAMPLE_ROWS = 2000
+DATE_FORMAT_SAMPLE = 200
+MIN_ROLE_SCORE = 0.4
+
+# Header keywords per role, matched against whole words of the header
+# ("count" no longer matches "account"). Generic words weigh less.
+ROLE_KEYWORDS = {
+    "date": {"date": 1.0, "timestamp": 0.8, "time": 0.6, "day": 0.5},
+    "product": {"product": 1.0, "item": 1.0, "sku": 0.9, "name": 0.4},
+    "quantity": {"qty": 1.0, "quantity": 1.0, "units": 0.9, "count": 0.5},
+    "price": {"price": 1.0, "cost": 0.7, "rate": 0.5},
+    "sales": {"sales": 1.0, "revenue": 1.0, "amount": 0.8, "total": 0.5},
+}
+ROLES = list(ROLE_KEYWORDS)
+
+
+def header_tokens(name):
+    """
+    Lower-case words of a header: "OrderDate", "order_date" and
+    "Order Date" all give ["order", "date"].
+    """
+
+    spaced = re.sub(r"([a-z0-9])([A-Z])", r"\1_\2", str(name))
+    return [token for token in re.split(r"[^a-z0-9]+", spaced.lower()) if token]
+
+
+def name_score(name, role):
+    """
+    Best keyword weight of the header for a role (0 when no word matches).
+    """
+
+    tokens = header_tokens(name)
+    joined = "_".join(tokens)
+    keywords = ROLE_KEYWORDS[role]
+
+    return max((weight for word, weight in keywords.items() if word in tokens or word == joined), default=0.0)
+
+
+def _date_rate(values):
+    # Vectorized formats only (no fuzzy fallback), on unique values
+    text = pd.Series(pd.unique(values), dtype=object).map(str)
+    if text.empty:
+        return 0.0
+
+    parsed = pd.Series(pd.NaT, index=text.index, dtype="datetime64[ns]")
+    for fmt in infer_date_formats(text, DATE_FORMAT_SAMPLE):
+        missing = parsed.isna()
+        if not missing.any():
+            break
+        parsed[missing] = pd.to_datetime(text[missing], format=fmt, errors="coerce")
+
+    # Weight unique values by how often they occur in the sample
+    ok = dict(zip(text, parsed.notna()))
+    return float(pd.Series(values).map(str).map(ok).mean())
+
+
+def profile_columns(df, sample_rows=PROFILE_SAMPLE_ROWS):
+    """
+    Cheap per-column statistics on at most sample_rows rows.
+
+    Rates are over non-null sample values:
+    date_rate, numeric_rate (what pd.to_numeric keeps, like preprocessing),
+    integer_rate and positive_rate (of the numeric values), plus
+    distinct count and distinct ratio.
+    """
+
+    sample = df if len(df) <= sample_rows else df.sample(sample_rows, random_state=0)
+
+    rows = []
+    for col in sample.columns:
+        values = sample[col].dropna()
+        n = len(values)
+
+        if pd.api.types.is_datetime64_any_dtype(values):
+            numbers = pd.Series(dtype=float)
+            date_rate = 1.0
+        else:
+            numbers = pd.to_numeric(values, errors="coerce").dropna()
+            numeric_rate = len(numbers) / n if n else 0.0
+            # Mostly-numeric columns are never dates; skip the parsing cost
+            date_rate = _date_rate(values.to_numpy()) if n and numeric_rate < 0.9 else 0.0
+
+        numbers = numbers.to_numpy(dtype=np.float64)
+        distinct = int(values.nunique())
+        rows.append({
+            "column": col,
+            "non_null_rate": n / len(sample) if len(sample) else 0.0,
+            "date_rate": date_rate,
+            "numeric_rate": len(numbers) / n if n else 0.0,
+            "integer_rate": float(np.mean(numbers == np.round(numbers))) if len(numbers) else 0.0,
+            "positive_rate": float(np.mean(numbers > 0)) if len(numbers) else 0.0,
+            "distinct": distinct,
+            "distinct_ratio": distinct / n if n else 0.0,
+        })
+
+    return pd.DataFrame(rows)
+
+
+def _value_scores(p):
+    """
+    How well a column's values fit each role (0 - 1).
+    """
+
+    text_rate = (1 - p["numeric_rate"]) * (1 - p["date_rate"])
+    # Products and quantities repeat; all-distinct columns look like IDs
+    repeats = 1.0 if 1 < p["distinct"] and p["distinct_ratio"] < 0.9 else 0.3
+    positive_numbers = p["numeric_rate"] * p["positive_rate"]
 
     return {
-        "date": date_col,
-        "product": product_col,
-        "quantity": quantity_col,
-        "price": price_col,
-        "sales": sales_col
+        "date": p["date_rate"],
+        "product": text_rate * repeats,
+        "quantity": positive_numbers * (0.5 + 0.5 * p["integer_rate"]) * repeats,
+        "price": positive_numbers * (1 - 0.5 * p["integer_rate"]),
+        "sales": positive_numbers * (1 - 0.5 * p["integer_rate"]),
     }
 
 
+def score_columns(columns, df=None, sample_rows=PROFILE_SAMPLE_ROWS):
+    """
+    Score table: one row per column, one score column per role.
+
+    Without data the score is the header match alone; with data it is
+    header match + value fit, and a column whose values cannot hold the
+    role (e.g. text for quantity) scores 0 whatever its name.
+    """
+
+    columns = list(columns)
+    scores = pd.DataFrame(
+        {role: [name_score(c, role) for c in columns] for role in ROLES},
+        index=columns
+    )
+    if df is None:
+        return scores
+
+    profile = profile_columns(df[columns], sample_rows).set_index("column")
+    for col in columns:
+        fit = _value_scores(profile.loc[col])
+        for role in ROLES:
+            scores.loc[col, role] = (scores.loc[col, role] + fit[role]) if fit[role] >= 0.5 else 0.0
+    return scores
+
+
+def auto_detect_columns(columns, df=None):
+    """
+    Map roles (date, product, quantity, price, sales) to columns.
+
+    Pass df (e.g. the upload preview) to score on sampled values as well
+    as header names. Each column is used for at most one role, best
+    scores first; a role stays None when nothing scores MIN_ROLE_SCORE.
+    Sales is optional, so it needs a matching header too.
+    """
+
+    scores = score_columns(columns, df)
+    if df is not None:
+        names = score_columns(columns)
+        scores.loc[names["sales"] == 0, "sales"] = 0.0
+
+    candidates = sorted(
+        ((scores.loc[col, role], role, col) for col in scores.index for role in ROLES),
+        key=lambda c: -c[0]
+    )
+
+    detected = {role: None for role in ROLES}
+    used = set()
+    for score, role, col in candidates:
+        if score < MIN_ROLE_SCORE or detected[role] is not None or col in used:
+            continue
+        detected[role] = col
+        used.add(col)
+
+    return detected
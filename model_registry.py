@@ -0,0 +1,191 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import joblib
+
+from dataset_cache import evict_lru
+
+REGISTRY_DIR = os.path.join("models", "registry")
+MODEL_FILE = "model.joblib"
+META_FILE = "meta.json"
+MAX_LOADED_MODELS = 4
+MAX_REGISTRY_BYTES = 4 * 1024 ** 3
+
+# Process-wide LRU of loaded models, shared by every session
+_loaded = OrderedDict()
+_lock = threading.Lock()
+
+
+def registry_key(fingerprint, config):
+    """
+    Model key = dataset fingerprint + training config (backend, params).
+    """
+
+    payload = json.dumps({"dataset": fingerprint, "config": config}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:24]
+
+
+def _model_dir(key, registry_dir):
+    return os.path.join(registry_dir, key)
+
+
+def model_meta_path(key, registry_dir=REGISTRY_DIR):
+    """
+    Path of a model's meta.json (rewritten on every registration, so its
+    mtime tells whether a key was re-registered).
+    """
+
+    return os.path.join(_model_dir(key, registry_dir), META_FILE)
+
+
+def read_model_meta(key, registry_dir=REGISTRY_DIR):
+    """
+    Metadata of a registered model (no model loading), or None.
+    """
+
+    path = model_meta_path(key, registry_dir)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def list_models(registry_dir=REGISTRY_DIR):
+    """
+    Metadata of every registered model, newest first.
+    """
+
+    if not os.path.isdir(registry_dir):
+        return []
+
+    metas = []
+    for key in os.listdir(registry_dir):
+        meta = read_model_meta(key, registry_dir)
+        if meta is not None:
+            metas.append(meta)
+    return sorted(metas, key=lambda m: m["created_at"], reverse=True)
+
+
+def find_latest_model(config, registry_dir=REGISTRY_DIR):
+    """
+    Newest registered model trained with this config (any dataset), or None.
+    """
+
+    for meta in list_models(registry_dir):
+        if meta["config"] == config:
+            return meta
+    return None
+
+
+def is_compatible(meta, products):
+    """
+    True if the model knows every product in `products` (checked from metadata only).
+    """
+
+    return set(products).issubset(meta["products"])
+
+
+def register_model(fingerprint, config, model, le, df, metrics=None, registry_dir=REGISTRY_DIR,
+                   max_bytes=MAX_REGISTRY_BYTES):
+    """
+    Save (model, le) with its metadata and return the registry key.
+
+    Metadata (products, date range, metrics, config) goes to meta.json next
+    to the model, so compatibility can be checked without loading it. The
+    model is saved uncompressed so it can be memory-mapped on load, so the
+    registry is kept under max_bytes by evicting least recently used models.
+    """
+
+    key = registry_key(fingerprint, config)
+    model_dir = _model_dir(key, registry_dir)
+    os.makedirs(model_dir, exist_ok=True)
+
+    model_path = os.path.join(model_dir, MODEL_FILE)
+    tmp_path = f"{model_path}.{uuid.uuid4().hex}.tmp"
+    joblib.dump((model, le), tmp_path)
+    os.replace(tmp_path, model_path)
+
+    meta = {
+        "key": key,
+        "dataset_fingerprint": fingerprint,
+        "config": config,
+        "products": sorted(str(p) for p in le.classes_),
+        "date_min": str(df["Date"].min().date()),
+        "date_max": str(df["Date"].max().date()),
+        "rows": int(len(df)),
+        "metrics": metrics or {},
+        "created_at": time.time(),
+    }
+    meta_path = os.path.join(model_dir, META_FILE)
+    tmp_path = f"{meta_path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_path, meta_path)
+
+    # A re-registered key must not serve the old cached model
+    with _lock:
+        _loaded.pop((registry_dir, key), None)
+
+    evict_models(registry_dir, max_bytes, keep=model_dir)
+    return key
+
+
+def evict_models(registry_dir=REGISTRY_DIR, max_bytes=MAX_REGISTRY_BYTES, keep=None):
+    """
+    Delete least recently used (registered or loaded) models until the
+    registry fits in max_bytes.
+    """
+
+    if not os.path.isdir(registry_dir):
+        return
+
+    evict_lru([os.path.join(registry_dir, key) for key in os.listdir(registry_dir)], max_bytes, keep=keep)
+
+    with _lock:
+        for cache_key in [k for k in _loaded if k[0] == registry_dir]:
+            if not os.path.isdir(_model_dir(cache_key[1], registry_dir)):
+                del _loaded[cache_key]
+
+
+def load_model(key, registry_dir=REGISTRY_DIR, writable=False):
+    """
+    Return (model, le) for a registered key.
+
+    By default the model comes from the process-wide LRU cache, loaded with
+    mmap_mode="r" so its numpy arrays are mapped from disk instead of copied.
+    Cached models are shared and read-only: pass writable=True to get a
+    private in-memory copy to update and re-register.
+    """
+
+    model_dir = _model_dir(key, registry_dir)
+    path = os.path.join(model_dir, MODEL_FILE)
+
+    # Directory mtime is the last use for registry eviction
+    try:
+        os.utime(model_dir)
+    except FileNotFoundError:
+        pass
+
+    if writable:
+        return joblib.load(path)
+
+    cache_key = (registry_dir, key)
+    with _lock:
+        if cache_key in _loaded:
+            _loaded.move_to_end(cache_key)
+            return _loaded[cache_key]
+
+    loaded = joblib.load(path, mmap_mode="r")
+
+    with _lock:
+        _loaded[cache_key] = loaded
+        _loaded.move_to_end(cache_key)
+        while len(_loaded) > MAX_LOADED_MODELS:
+            _loaded.popitem(last=False)
+
+    return loaded
@@ -0,0 +1,247 @@
+"""
+Out-of-core aggregation over cleaned Parquet files.
+
+    engine = OutOfCoreEngine("cache/ooc/<key>/rows")     # dir, file or list of files
+    summary, top_df, low_df, product_summary = engine.analyze()
+    daily = engine.daily_sales()                        # Date, Total_Sales
+    cells = engine.product_day_cells()                  # forecast / sales cube input
+
+Runs on an embedded DuckDB when it is installed, otherwise on a streamed
+pyarrow dataset scan (batch by batch, partial aggregates merged as they
+grow). Either way only aggregates are materialized, never the rows, and the
+result frames match the in-memory pipeline (analysis.analyze_sales,
+df.groupby("Date")).
+"""
+
+import glob
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from analysis import analyze_sales, complete_product_aggregates
+from append_store import read_store_meta, store_path
+from dataset_cache import evict_lru
+from ingest import stream_clean_to_store
+from profiling import profiled
+from sales_cube import CELL_COLUMNS
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+OOC_ROOT = os.path.join("cache", "ooc")
+MAX_OOC_BYTES = 20 * 1024 ** 3
+SCAN_BATCH_ROWS = 1_000_000
+# Merge arrow partial aggregates once this many partial rows are pending
+MERGE_PARTIAL_ROWS = 2_000_000
+
+
+def available_engines():
+    return (["duckdb"] if duckdb is not None else []) + ["arrow"]
+
+
+def _parquet_files(source):
+    if isinstance(source, (list, tuple)):
+        return [os.path.abspath(path) for path in source]
+    if os.path.isdir(source):
+        return sorted(glob.glob(os.path.join(os.path.abspath(source), "**", "*.parquet"), recursive=True))
+    return [os.path.abspath(source)]
+
+
+class OutOfCoreEngine:
+    """
+    Aggregations behind the analysis pages, computed over files on disk.
+
+    engine="duckdb" or "arrow"; default: DuckDB if installed.
+    """
+
+    def __init__(self, source, engine=None):
+        self.files = _parquet_files(source)
+        if not self.files:
+            raise ValueError(f"No Parquet files found in {source}")
+
+        engine = engine or available_engines()[0]
+        if engine == "duckdb" and duckdb is None:
+            raise ValueError("DuckDB is not installed (pip install duckdb), use engine='arrow'.")
+        if engine not in ("duckdb", "arrow"):
+            raise ValueError(f"Unknown out-of-core engine '{engine}'")
+        self.engine = engine
+
+    # ---------------- DuckDB ----------------
+    def _sql(self, select):
+        con = duckdb.connect()
+        try:
+            return con.execute(select.replace("{rows}", "read_parquet($files)"), {"files": self.files}).df()
+        finally:
+            con.close()
+
+    # ---------------- Arrow ----------------
+    def _scan_grouped(self, keys):
+        """
+        Sum Total_Sales / Quantity and count rows per `keys`, streaming the
+        dataset in record batches.
+        """
+
+        dataset = ds.dataset(self.files, format="parquet")
+        columns = list(dict.fromkeys(keys + ["Total_Sales", "Quantity"]))
+
+        partials = []
+        pending = 0
+        for batch in dataset.to_batches(columns=columns, batch_size=SCAN_BATCH_ROWS):
+            if batch.num_rows == 0:
+                continue
+            table = pa.Table.from_batches([batch])
+            if "Product" in keys and pa.types.is_dictionary(table.schema.field("Product").type):
+                table = table.set_column(
+                    table.schema.get_field_index("Product"), "Product",
+                    table["Product"].cast(pa.string())
+                )
+
+            grouped = table.group_by(keys).aggregate([
+                ("Total_Sales", "sum"), ("Quantity", "sum"), ("Total_Sales", "count"),
+            ]).to_pandas()
+            partials.append(grouped.rename(columns={
+                "Total_Sales_sum": "Total_Sales",
+                "Quantity_sum": "Total_Quantity",
+                "Total_Sales_count": "Transaction_Count",
+            }))
+
+            pending += len(grouped)
+            if pending > MERGE_PARTIAL_ROWS:
+                partials = [self._merge(partials, keys)]
+                pending = len(partials[0])
+
+        if not partials:
+            return pd.DataFrame(columns=keys + ["Total_Sales", "Total_Quantity", "Transaction_Count"])
+        return self._merge(partials, keys)
+
+    @staticmethod
+    def _merge(partials, keys):
+        merged = pd.concat(partials, ignore_index=True)
+        return merged.groupby(keys, as_index=False, sort=False).sum()
+
+    # ---------------- Results ----------------
+    @profiled(rows_from=None)
+    def row_count(self):
+        if self.engine == "duckdb":
+            return int(self._sql("SELECT count(*) AS n FROM {rows}")["n"].iat[0])
+        return int(ds.dataset(self.files, format="parquet").count_rows())
+
+    @profiled(rows_from=None)
+    def product_aggregates(self):
+        """
+        Same frame as analysis.product_aggregates(df) over all rows.
+        """
+
+        if self.engine == "duckdb":
+            agg = self._sql(
+                "SELECT CAST(Product AS VARCHAR) AS Product, sum(Total_Sales) AS Total_Sales, "
+                "sum(Quantity) AS Total_Quantity, count(*) AS Transaction_Count "
+                "FROM {rows} GROUP BY 1"
+            )
+        else:
+            agg = self._scan_grouped(["Product"])
+
+        agg = agg.sort_values("Product").reset_index(drop=True)
+        agg["Transaction_Count"] = agg["Transaction_Count"].astype(np.int64)
+        return complete_product_aggregates(agg)
+
+    def analyze(self, n=10):
+        """
+        (summary, top_df, low_df, product_summary), as analysis.analyze_sales(df).
+        """
+
+        return analyze_sales(None, n=n, agg=self.product_aggregates())
+
+    @profiled(rows_from=None)
+    def daily_sales(self):
+        """
+        (Date, Total_Sales) per day, as df.groupby("Date")["Total_Sales"].sum().
+        """
+
+        if self.engine == "duckdb":
+            daily = self._sql("SELECT Date, sum(Total_Sales) AS Total_Sales FROM {rows} GROUP BY 1")
+        else:
+            daily = self._scan_grouped(["Date"])[["Date", "Total_Sales"]]
+        return daily.sort_values("Date").reset_index(drop=True)
+
+    @profiled(rows_from=None)
+    def product_day_cells(self):
+        """
+        One row per (day, product) with sales, quantity and transaction count.
+
+        Much smaller than the transactions; feeds sales_cube.build_sales_cube
+        and forecasting (build_product_daily / build_future_features only
+        need Date, Product and Total_Sales).
+        """
+
+        if self.engine == "duckdb":
+            cells = self._sql(
+                "SELECT Date, CAST(Product AS VARCHAR) AS Product, sum(Total_Sales) AS Total_Sales, "
+                "sum(Quantity) AS Total_Quantity, count(*) AS Transaction_Count "
+                "FROM {rows} GROUP BY 1, 2"
+            )
+        else:
+            cells = self._scan_grouped(["Date", "Product"])
+
+        cells = cells.sort_values(["Product", "Date"]).reset_index(drop=True)
+        cells["Transaction_Count"] = cells["Transaction_Count"].astype(np.int64)
+        cells["Product"] = cells["Product"].astype("category")
+        return cells[CELL_COLUMNS]
+
+    def product_daily(self):
+        """
+        (Date, Product, Total_Sales): the forecast training input.
+        """
+
+        return self.product_day_cells()[["Date", "Product", "Total_Sales"]]
+
+
+def load_out_of_core(file, dataset_key, date_col, product_col, qty_col, price_col, sales_col=None,
+                     root=OOC_ROOT, engine=None, max_bytes=MAX_OOC_BYTES):
+    """
+    Clean a CSV to Parquet parts on disk (once per dataset key) and return
+    (OutOfCoreEngine or None when nothing survived cleaning, raw_row_count).
+
+    A "done.json" marker is written last, so an interrupted ingest is
+    redone instead of being read half-finished. Finished stores are kept
+    under max_bytes by evicting the least recently used ones.
+    """
+
+    store_dir = store_path(dataset_key, root=root)
+    marker = os.path.join(store_dir, "done.json")
+
+    if os.path.exists(marker):
+        with open(marker) as f:
+            raw_rows = json.load(f)["raw_rows"]
+        os.utime(store_dir)
+    else:
+        _, raw_rows, encoding = stream_clean_to_store(
+            file, store_dir, date_col, product_col, qty_col, price_col, sales_col
+        )
+        os.makedirs(store_dir, exist_ok=True)
+        with open(marker, "w") as f:
+            json.dump({"raw_rows": raw_rows, "encoding": encoding}, f)
+        evict_out_of_core(root, max_bytes, keep=store_dir)
+
+    if not read_store_meta(store_dir)["parts"]:
+        return None, raw_rows
+    return OutOfCoreEngine(os.path.join(store_dir, "rows"), engine=engine), raw_rows
+
+
+def evict_out_of_core(root=OOC_ROOT, max_bytes=MAX_OOC_BYTES, keep=None):
+    """
+    Delete least recently used finished stores until root fits in max_bytes
+    (ingests still running have no marker yet and are left alone).
+    """
+
+    if not os.path.isdir(root):
+        return
+
+    stores = [os.path.join(root, name) for name in os.listdir(root)]
+    evict_lru([path for path in stores if os.path.exists(os.path.join(path, "done.json"))], max_bytes, keep=keep)
@@ -1,10 +1,107 @@
+import numpy as np
 import pandas as pd
 from dateutil import parser
-import streamlit as st
 
-@st.cache_data
-def preprocess_data(df, date_col, product_col, qty_col, price_col, sales_col=None):
-    df = df.copy()
+from profiling import profiled
+
+# Formats tried by the vectorized date parser. Only formats that read a value
+# the same way dateutil does are listed (e.g. no day-first slashes), so the
+# fast path never disagrees with the fuzzy fallback. Two-digit years are left
+# to dateutil too: its century pivot differs from strptime's 1969 cutoff.
+DATE_FORMATS = [
+    "%Y-%m-%d",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d %H:%M",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y/%m/%d",
+    "%m/%d/%Y",
+    "%m/%d/%Y %H:%M",
+    "%m/%d/%Y %H:%M:%S",
+    "%d-%b-%Y",
+    "%d %b %Y",
+    "%b %d, %Y",
+    "%B %d, %Y",
+]
+
+DATE_SAMPLE_SIZE = 1000
+
+
+def _fuzzy_parse(text):
+    try:
+        return parser.parse(text, fuzzy=True)
+    except (ValueError, OverflowError):
+        return pd.NaT
+
+
+def infer_date_formats(text, sample_size=DATE_SAMPLE_SIZE):
+    """
+    Return the DATE_FORMATS that match part of a sample of string values,
+    best first (shared by parse_dates and mapper's date profiling).
+    """
+
+    sample = text if len(text) <= sample_size else text.sample(sample_size, random_state=0)
+
+    hits = []
+    for fmt in DATE_FORMATS:
+        matched = pd.to_datetime(sample, format=fmt, errors="coerce").notna().sum()
+        if matched:
+            hits.append((matched, fmt))
+
+    hits.sort(key=lambda h: -h[0])
+    return [fmt for _, fmt in hits]
+
+
+@profiled()
+def parse_dates(values, sample_size=DATE_SAMPLE_SIZE):
+    """
+    Parse a column of messy dates, same result as row-wise fuzzy dateutil.
+
+    Steps:
+    1) Work on unique values only (order dates repeat heavily)
+    2) Infer likely formats from a sample of the unique values
+    3) Parse the bulk with vectorized pd.to_datetime(format=...)
+    4) Fuzzy dateutil parsing only for values no format matched
+    """
+
+    codes, uniques = pd.factorize(values)
+    text = pd.Series(uniques, dtype=object).map(str)
+
+    # One extra slot at the end holds NaT for missing values (code -1)
+    parsed = np.full(len(text) + 1, pd.NaT, dtype=object)
+    remaining = np.ones(len(text), dtype=bool)
+
+    for fmt in infer_date_formats(text, sample_size):
+        if not remaining.any():
+            break
+
+        pending = text[remaining]
+        out = pd.to_datetime(pending, format=fmt, errors="coerce")
+        ok = out.notna().to_numpy()
+
+        positions = np.flatnonzero(remaining)[ok]
+        parsed[positions] = out[ok].astype(object).to_numpy()
+        remaining[positions] = False
+
+    # Residual values: fuzzy parsing, once per unique value
+    for pos in np.flatnonzero(remaining):
+        parsed[pos] = _fuzzy_parse(text.iat[pos])
+
+    parsed_dates = pd.to_datetime(pd.Series(parsed), errors="coerce")
+
+    codes = np.where(codes < 0, len(text), codes)
+    result = parsed_dates.take(codes)
+    result.index = values.index
+    return result
+
+
+@profiled()
+def clean_chunk(df, date_col, product_col, qty_col, price_col, sales_col=None):
+    """
+    Select, rename, coerce and filter one block of raw rows.
+
+    Everything in preprocess_data except de-duplication, so it can run on
+    each chunk of a streamed CSV independently.
+    """
 
     selected_cols = [date_col, product_col, qty_col, price_col]
     if sales_col:
@@ -14,9 +111,8 @@ def preprocess_data(df, date_col, product_col, qty_col, price_col, sales_col=Non
 
     df.columns = ["Date", "Product", "Quantity", "Price"] + (["Total_Sales"] if sales_col else [])
 
-    # Robust Date Parsing
-    df["Date"] = df["Date"].apply(lambda x: parser.parse(str(x), fuzzy=True) if pd.notna(x) else pd.NaT)
-    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+    # Robust Date Parsing (vectorized, fuzzy fallback for odd values)
+    df["Date"] = parse_dates(df["Date"])
 
     # Convert numeric values
     df["Quantity"] = pd.to_numeric(df["Quantity"], errors="coerce")
@@ -27,16 +123,84 @@ def preprocess_data(df, date_col, product_col, qty_col, price_col, sales_col=Non
 
     # Remove invalid rows
     df.dropna(inplace=True)
+
+    # One spelling per product, whatever dtype read_csv inferred for this block
+    df["Product"] = product_names(df["Product"])
     df = df[df["Quantity"] > 0]
     df = df[df["Price"] > 0]
 
     if sales_col:
         df = df[df["Total_Sales"] > 0]
 
-    df.drop_duplicates(inplace=True)
-
     # Compute Total_Sales if not given
     if not sales_col:
+        df = df.copy()
         df["Total_Sales"] = df["Quantity"] * df["Price"]
 
     return df
+
+
+def product_names(values):
+    """
+    Product values as strings. read_csv infers the product column per file
+    or per chunk, so the same SKU can arrive as 100, 100.0 or "100"; all
+    three become "100".
+    """
+
+    codes, uniques = pd.factorize(values)
+    names = np.array([_product_name(value) for value in uniques], dtype=object)
+    return pd.Series(names[codes] if len(codes) else names[:0], index=values.index, dtype=object)
+
+
+def _product_name(value):
+    if isinstance(value, (float, np.floating)) and value == np.round(value) and abs(value) < 2 ** 53:
+        return str(int(value))
+    return str(value)
+
+
+def frame_memory_mb(df):
+    return df.memory_usage(index=True, deep=True).sum() / 1024 ** 2
+
+
+def _downcast_numeric(series):
+    # Whole-number columns shrink to the smallest int type; other floats
+    # stay float64 (float32 would round prices and sales totals)
+    values = series.to_numpy()
+    if len(values) and np.abs(values).max() < 2 ** 53 and (values == np.round(values)).all():
+        return pd.to_numeric(series.astype("int64"), downcast="integer")
+    return series
+
+
+@profiled()
+def compact_frame(df):
+    """
+    Normalize a cleaned frame to a compact schema.
+
+    - Product: categorical with sorted categories (one shared dictionary)
+    - Quantity / Price / Total_Sales: smallest lossless numeric type
+    - Date: datetime64
+
+    Memory before/after (MB) is recorded in df.attrs["memory_footprint"].
+    """
+
+    before_mb = frame_memory_mb(df)
+
+    df = df.copy(deep=False)
+    df["Product"] = df["Product"].astype("category")
+    for col in ["Quantity", "Price", "Total_Sales"]:
+        if col in df.columns:
+            df[col] = _downcast_numeric(df[col])
+    df["Date"] = pd.to_datetime(df["Date"])
+
+    df.attrs["memory_footprint"] = {
+        "before_mb": round(float(before_mb), 3),
+        "after_mb": round(float(frame_memory_mb(df)), 3),
+    }
+    return df
+
+
+@profiled()
+def preprocess_data(df, date_col, product_col, qty_col, price_col, sales_col=None):
+    df = clean_chunk(df, date_col, product_col, qty_col, price_col, sales_col)
+    df.drop_duplicates(inplace=True)
+    return compact_frame(df)
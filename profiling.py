@@ -0,0 +1,260 @@
+"""
+Lightweight per-stage instrumentation.
+
+    with stage("render_chart", rows=len(df)):
+        ...
+
+    @profiled("analysis.product_aggregates")
+    def product_aggregates(df): ...
+
+Each stage records wall time, rows processed and peak traced memory.
+Recording is process-wide and OFF by default: while disabled, decorated
+functions are called straight through and stage() does no timing at all.
+
+Recording is on while enable(True) is set (scripts) or any hold() handle
+is alive (one per app session that turned it on), so sessions never switch
+it off for each other. tracemalloc's peak is process-wide too: a stage gets
+peak_mb only if no stage ran in another thread meanwhile, else None.
+"""
+
+import csv
+import functools
+import io
+import json
+import threading
+import time
+import tracemalloc
+import weakref
+from contextlib import contextmanager
+
+import pandas as pd
+
+MAX_RECORDS = 5000
+
+_enabled = False
+_track_memory = True
+_records = []
+# Reentrant: a hold's finalizer can run from garbage collection while the lock is held
+_lock = threading.RLock()
+_local = threading.local()
+
+# Explicit setting (enable()) and live hold() handles: [all, with memory]
+_forced = {"on": False, "track_memory": True}
+_holds = [0, 0]
+
+# Thread ident -> that thread's open stages
+_open_stages = {}
+
+
+def _apply():
+    global _enabled, _track_memory
+    _enabled = _forced["on"] or _holds[0] > 0
+    _track_memory = (_forced["on"] and _forced["track_memory"]) or _holds[1] > 0
+
+    if _enabled and _track_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    elif tracemalloc.is_tracing() and not (_enabled and _track_memory):
+        tracemalloc.stop()
+
+
+def enable(on=True, track_memory=True):
+    """
+    Turn the process-wide setting on/off (scripts, benchmarks). Memory
+    tracking uses tracemalloc, which slows allocation-heavy code, so it can
+    be switched off separately. Live hold() handles keep recording on.
+    """
+
+    with _lock:
+        _forced["on"] = bool(on)
+        _forced["track_memory"] = bool(track_memory)
+        _apply()
+
+
+def _release(track_memory):
+    with _lock:
+        _holds[0] -= 1
+        _holds[1] -= int(track_memory)
+        _apply()
+
+
+class ProfilingHold:
+    """
+    Keeps recording on until release() is called or the handle is garbage
+    collected (e.g. with the session state holding it).
+    """
+
+    def __init__(self, track_memory=True):
+        with _lock:
+            _holds[0] += 1
+            _holds[1] += int(track_memory)
+            _apply()
+        self._finalizer = weakref.finalize(self, _release, bool(track_memory))
+
+    def release(self):
+        # finalize objects run once, so a double release is harmless
+        self._finalizer()
+
+
+def hold(track_memory=True):
+    """
+    Turn recording on for as long as the returned ProfilingHold lives.
+    """
+
+    return ProfilingHold(track_memory)
+
+
+def is_enabled():
+    return _enabled
+
+
+def _row_count(value):
+    try:
+        return len(value)
+    except TypeError:
+        return None
+
+
+@contextmanager
+def stage(name, rows=None):
+    """
+    Time a block. Yields a dict; set record["rows"] inside the block if the
+    row count is only known later.
+    """
+
+    if not _enabled:
+        yield {}
+        return
+
+    record = {"stage": name, "rows": rows}
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+
+    with _lock:
+        _open_stages[threading.get_ident()] = stack
+
+        # The peak counter is shared: stages overlapping across threads get no memory figure
+        others = [r for ident, s in _open_stages.items() if ident != threading.get_ident() for r in s]
+        for other in others:
+            other["_shared"] = True
+
+        tracking = _track_memory and tracemalloc.is_tracing() and not others
+        if tracking:
+            start_mem, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            record["_peak"] = start_mem
+        else:
+            record["_shared"] = True
+
+        stack.append(record)
+
+    started = time.perf_counter()
+    record["started_at"] = time.time()
+    try:
+        yield record
+    finally:
+        record["seconds"] = round(time.perf_counter() - started, 6)
+
+        with _lock:
+            stack.pop()
+            if not stack:
+                _open_stages.pop(threading.get_ident(), None)
+
+            peak_mb = None
+            shared = record.pop("_shared", False)
+            if tracking and not shared and tracemalloc.is_tracing():
+                _, peak = tracemalloc.get_traced_memory()
+                peak = max(peak, record.pop("_peak"))
+                peak_mb = round((peak - start_mem) / 1024 ** 2, 3)
+
+                # Nested stages reset the peak counter: hand the peak to the parent
+                if stack and "_peak" in stack[-1]:
+                    stack[-1]["_peak"] = max(stack[-1]["_peak"], peak)
+                tracemalloc.reset_peak()
+            else:
+                record.pop("_peak", None)
+
+            record["peak_mb"] = peak_mb
+            record["thread"] = threading.current_thread().name
+
+            _records.append(record)
+            if len(_records) > MAX_RECORDS:
+                del _records[:len(_records) - MAX_RECORDS]
+
+
+def profiled(name=None, rows_from=0):
+    """
+    Decorator version of stage(). Rows = len() of the positional argument
+    at index rows_from (default: the first one, usually the DataFrame being
+    processed); rows_from=None records no row count.
+    """
+
+    def decorate(fn):
+        stage_name = name or f"{fn.__module__}.{fn.__name__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+
+            rows = _row_count(args[rows_from]) if rows_from is not None and len(args) > rows_from else None
+            with stage(stage_name, rows=rows):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def records():
+    with _lock:
+        return [dict(r) for r in _records]
+
+
+def clear():
+    with _lock:
+        _records.clear()
+
+
+RECORD_COLUMNS = ["stage", "seconds", "rows", "peak_mb", "started_at", "thread"]
+
+
+def to_frame():
+    return pd.DataFrame(records(), columns=RECORD_COLUMNS)
+
+
+def summary_frame():
+    """
+    Per-stage totals: calls, total/mean/max seconds, rows, max peak memory.
+    """
+
+    df = to_frame()
+    if df.empty:
+        return pd.DataFrame(columns=["stage", "calls", "total_seconds", "mean_seconds",
+                                     "max_seconds", "rows", "max_peak_mb"])
+
+    return (
+        df.groupby("stage")
+        .agg(
+            calls=("seconds", "size"),
+            total_seconds=("seconds", "sum"),
+            mean_seconds=("seconds", "mean"),
+            max_seconds=("seconds", "max"),
+            rows=("rows", "sum"),
+            max_peak_mb=("peak_mb", "max"),
+        )
+        .sort_values("total_seconds", ascending=False)
+        .reset_index()
+    )
+
+
+def export_json():
+    return json.dumps(records(), indent=2, default=str)
+
+
+def export_csv():
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=RECORD_COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    writer.writerows(records())
+    return buffer.getvalue()
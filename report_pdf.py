@@ -1,56 +1,173 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
 
-def generate_pdf_report(summary, top_df, low_df, future_df=None, filename="report.pdf"):
-    c = canvas.Canvas(filename, pagesize=A4)
-    width, height = A4
+from profiling import profiled
 
-    y = height - 50
-    c.setFont("Helvetica-Bold", 16)
-    c.drawString(50, y, "Universal Company Analyzer Report")
+TOP_MARGIN = 50
+BOTTOM_MARGIN = 50
+MAX_TEXT_CHARS = 95
+MAX_CACHED_REPORTS = 16
 
-    y -= 40
-    c.setFont("Helvetica-Bold", 12)
-    c.drawString(50, y, "Summary:")
-    y -= 20
+# Process-wide cache of finished reports: report fingerprint -> PDF bytes
+_report_cache = OrderedDict()
+_report_lock = threading.Lock()
 
-    c.setFont("Helvetica", 11)
-    for k, v in summary.items():
-        c.drawString(60, y, f"{k}: {v}")
-        y -= 18
 
-    y -= 10
-    c.setFont("Helvetica-Bold", 12)
-    c.drawString(50, y, "Top Products:")
-    y -= 20
+class _PageWriter:
+    """
+    Draws lines top-down and starts a new page (repeating the section
+    heading) whenever the next line would run off the bottom.
+    """
 
-    c.setFont("Helvetica", 10)
-    for _, row in top_df.head(10).iterrows():
-        c.drawString(60, y, f"{row['Product']}  |  {row['Total_Sales']}")
-        y -= 15
+    def __init__(self, target):
+        self.c = canvas.Canvas(target, pagesize=A4)
+        self.width, self.height = A4
+        self.y = self.height - TOP_MARGIN
 
-    y -= 10
-    c.setFont("Helvetica-Bold", 12)
-    c.drawString(50, y, "Low Products:")
-    y -= 20
+    def new_page(self):
+        self.c.showPage()
+        self.y = self.height - TOP_MARGIN
 
-    c.setFont("Helvetica", 10)
-    for _, row in low_df.head(10).iterrows():
-        c.drawString(60, y, f"{row['Product']}  |  {row['Total_Sales']}")
-        y -= 15
+    def title(self, text):
+        self.c.setFont("Helvetica-Bold", 16)
+        self.c.drawString(50, self.y, text)
+        self.y -= 40
+
+    def heading(self, text):
+        if self.y - 35 < BOTTOM_MARGIN:
+            self.new_page()
+        self.c.setFont("Helvetica-Bold", 12)
+        self.c.drawString(50, self.y, text)
+        self.y -= 20
+
+    def lines(self, texts, heading, font_size=10, leading=15):
+        """
+        Write an iterable of strings under `heading`, one text object per
+        page (much faster than a drawString call per line).
+        """
+
+        self.heading(heading)
+        text = self._text_object(font_size, leading)
+        for line in texts:
+            if self.y < BOTTOM_MARGIN:
+                self.c.drawText(text)
+                self.new_page()
+                self.heading(f"{heading} (continued)")
+                text = self._text_object(font_size, leading)
+            text.textLine(line[:MAX_TEXT_CHARS])
+            self.y -= leading
+        self.c.drawText(text)
+        self.y -= 10
+
+    def _text_object(self, font_size, leading):
+        text = self.c.beginText(60, self.y)
+        text.setFont("Helvetica", font_size)
+        text.setLeading(leading)
+        return text
+
+    def save(self):
+        self.c.save()
+
+
+def _product_lines(df):
+    return (
+        f"{product}  |  {sales}"
+        for product, sales in zip(df["Product"].to_numpy(), df["Total_Sales"].to_numpy())
+    )
+
+
+def _summary_table_lines(df):
+    columns = zip(
+        df["Product"].to_numpy(),
+        df["Total_Sales"].to_numpy(dtype=np.float64),
+        df["Total_Quantity"].to_numpy(dtype=np.float64),
+        df["Transaction_Count"].to_numpy(),
+        df["Contribution_Percentage"].to_numpy(dtype=np.float64),
+    )
+    return (
+        f"{product}  |  {sales:.2f}  |  qty {quantity:g}  |  {count} txns  |  {share:.2f}%"
+        for product, sales, quantity, count, share in columns
+    )
+
+
+def _forecast_lines(df):
+    columns = zip(
+        df["Date"].dt.strftime("%Y-%m-%d").to_numpy(),
+        df["Product"].to_numpy(),
+        df["Predicted_Sales"].to_numpy(dtype=np.float64),
+    )
+    return (f"{day}  |  {product}  |  {round(sales, 2)}" for day, product, sales in columns)
 
-    if future_df is not None and not future_df.empty:
-        y -= 10
-        c.setFont("Helvetica-Bold", 12)
-        c.drawString(50, y, "Future Sales Prediction:")
-        y -= 20
 
-        c.setFont("Helvetica", 10)
-        for _, row in future_df.head(10).iterrows():
-            c.drawString(60, y, f"{row['Date'].date()}  |  {round(row['Predicted_Sales'], 2)}")
-            y -= 15
+@profiled(rows_from=None)
+def generate_pdf_report(summary, top_df, low_df, future_df=None, filename="report.pdf", product_summary=None):
+    """
+    Write the report to `filename` (a path or a binary file object, e.g. BytesIO).
 
-    c.save()
+    Every table is paginated in full; pass product_summary to include the
+    whole product catalog. Returns filename.
+    """
+
+    writer = _PageWriter(filename)
+    writer.title("Universal Company Analyzer Report")
+
+    writer.lines((f"{k}: {v}" for k, v in summary.items()), "Summary:", font_size=11, leading=18)
+    writer.lines(_product_lines(top_df), "Top Products:")
+    writer.lines(_product_lines(low_df), "Low Products:")
+
+    if product_summary is not None and not product_summary.empty:
+        writer.lines(_summary_table_lines(product_summary), "Product Sales Summary:")
+
+    if future_df is not None and not future_df.empty:
+        writer.lines(_forecast_lines(future_df), "Future Sales Prediction:")
+
+    writer.save()
     return filename
 
 
+def report_fingerprint(summary, *frames):
+    """
+    Stable key for a report: hash of the summary values plus the content of
+    every table that goes into it (None entries allowed).
+    """
+
+    digest = hashlib.sha256(json.dumps(summary, sort_keys=True, default=str).encode())
+    for df in frames:
+        if df is None:
+            digest.update(b"-")
+        else:
+            digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()[:24]
+
+
+def pdf_report_bytes(summary, top_df, low_df, future_df=None, product_summary=None):
+    """
+    Render the report into memory and return the PDF bytes.
+
+    Reports are cached per process by report_fingerprint, so concurrent
+    sessions never share a file on disk and an unchanged report is not re-rendered.
+    """
+
+    key = report_fingerprint(summary, top_df, low_df, future_df, product_summary)
+    with _report_lock:
+        if key in _report_cache:
+            _report_cache.move_to_end(key)
+            return _report_cache[key]
+
+    buffer = BytesIO()
+    generate_pdf_report(summary, top_df, low_df, future_df, filename=buffer, product_summary=product_summary)
+    pdf = buffer.getvalue()
+
+    with _report_lock:
+        _report_cache[key] = pdf
+        while len(_report_cache) > MAX_CACHED_REPORTS:
+            _report_cache.popitem(last=False)
+    return pdf
@@ -0,0 +1,227 @@
+"""
+Materialized product x day sales cube.
+
+    cube = build_sales_cube(df_clean)
+    cube.slice(start="2024-01-01", products=["SKU-1", "SKU-2"])
+    cube.product_totals(start=..., end=...)      # analysis.product_aggregates format
+    cube.period_totals("week")                   # trend chart input
+    cube.product_daily()                         # forecast training input
+
+Only non-empty (day, product) cells are stored, as parallel arrays sorted by
+(date code, product code). dates_ is sorted, so a date range is two binary
+searches into a CSR offset array; a per-product order of the same cells
+(sorted by date inside each product) answers product subsets the same way.
+Week and month rollups are cubes of the same shape built at construction.
+"""
+
+import numpy as np
+import pandas as pd
+
+from analysis import complete_product_aggregates
+from profiling import profiled
+
+GRAINS = ["day", "week", "month"]
+CELL_COLUMNS = ["Date", "Product", "Total_Sales", "Total_Quantity", "Transaction_Count"]
+
+# Below this many requested products, slice per product; above it, filter
+# the date range with a product mask
+PRODUCT_SLICE_LIMIT = 1000
+
+
+def _period_starts(dates, grain):
+    if grain == "day":
+        return dates
+    if grain == "week":
+        # Weeks start on Monday (same buckets as charts.RESOLUTIONS)
+        return dates - pd.to_timedelta(dates.dayofweek, unit="D")
+    return dates.to_period("M").to_timestamp()
+
+
+class SalesCube:
+    """
+    One grain of the cube. Build with build_sales_cube(df), which also
+    attaches the "week" and "month" rollups (cube.rollup(grain)).
+    """
+
+    def __init__(self, dates, products, date_codes, product_codes, sales, quantity, counts, grain="day"):
+        # Aggregate (date, product) pairs into sorted, unique cells
+        width = max(len(products), 1)
+        keys = date_codes.astype(np.int64) * width + product_codes
+        cell, cell_keys = pd.factorize(keys, sort=True)
+
+        self.grain = grain
+        self.dates_ = pd.DatetimeIndex(dates)
+        self.products_ = pd.Index(products)
+        self.date_codes = (cell_keys // width).astype(np.int32)
+        self.product_codes = (cell_keys % width).astype(np.int32)
+        self.sales = np.bincount(cell, weights=sales, minlength=len(cell_keys))
+        self.quantity = np.bincount(cell, weights=quantity, minlength=len(cell_keys))
+        self.counts = np.bincount(cell, weights=counts, minlength=len(cell_keys)).astype(np.int64)
+
+        # CSR offsets: cells of date code d are date_offsets[d]:date_offsets[d + 1]
+        self.date_offsets = np.searchsorted(self.date_codes, np.arange(len(self.dates_) + 1))
+
+        # Same cells in product-major order (dates stay sorted inside a product)
+        self.by_product = np.argsort(self.product_codes, kind="stable")
+        self.product_offsets = np.searchsorted(
+            self.product_codes[self.by_product], np.arange(len(self.products_) + 1)
+        )
+
+        self.rollups = {}
+
+    def __len__(self):
+        return len(self.sales)
+
+    @property
+    def nbytes(self):
+        arrays = (
+            self.date_codes, self.product_codes, self.sales, self.quantity,
+            self.counts, self.date_offsets, self.by_product, self.product_offsets
+        )
+        return sum(a.nbytes for a in arrays) + sum(cube.nbytes for cube in self.rollups.values())
+
+    def rollup(self, grain):
+        if grain == self.grain:
+            return self
+        return self.rollups[grain]
+
+    def _date_bounds(self, start=None, end=None):
+        # Binary search on sorted dates; end is inclusive
+        lo = 0 if start is None else self.dates_.searchsorted(pd.Timestamp(start), side="left")
+        hi = len(self.dates_) if end is None else self.dates_.searchsorted(pd.Timestamp(end), side="right")
+        return lo, hi
+
+    def _cell_positions(self, start=None, end=None, products=None):
+        """
+        Positions of the cells inside the date range / product subset.
+        """
+
+        lo, hi = self._date_bounds(start, end)
+
+        if products is None:
+            return np.arange(self.date_offsets[lo], self.date_offsets[hi])
+
+        codes = self.products_.get_indexer(list(products))
+        codes = np.unique(codes[codes >= 0])
+
+        if len(codes) > PRODUCT_SLICE_LIMIT:
+            positions = np.arange(self.date_offsets[lo], self.date_offsets[hi])
+            wanted = np.zeros(len(self.products_), dtype=bool)
+            wanted[codes] = True
+            return positions[wanted[self.product_codes[positions]]]
+
+        parts = []
+        for code in codes:
+            cells = self.by_product[self.product_offsets[code]:self.product_offsets[code + 1]]
+            day_codes = self.date_codes[cells]
+            parts.append(cells[np.searchsorted(day_codes, lo):np.searchsorted(day_codes, hi)])
+
+        positions = np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+        return np.sort(positions)
+
+    def slice(self, start=None, end=None, products=None, grain="day"):
+        """
+        Cells (Date, Product, Total_Sales, Total_Quantity, Transaction_Count)
+        between start and end (inclusive) for the given products (None = all),
+        at the requested grain.
+        """
+
+        cube = self.rollup(grain)
+        positions = cube._cell_positions(start, end, products)
+
+        return pd.DataFrame({
+            "Date": cube.dates_[cube.date_codes[positions]],
+            "Product": cube.products_[cube.product_codes[positions]],
+            "Total_Sales": cube.sales[positions],
+            "Total_Quantity": cube.quantity[positions],
+            "Transaction_Count": cube.counts[positions],
+        }, columns=CELL_COLUMNS)
+
+    def product_totals(self, start=None, end=None, products=None):
+        """
+        Per-product totals in analysis.product_aggregates format (feed to
+        analyze_sales(None, agg=...)). Products without sales in the slice
+        are left out.
+        """
+
+        positions = self._cell_positions(start, end, products)
+        codes = self.product_codes[positions]
+        n = len(self.products_)
+
+        counts = np.bincount(codes, weights=self.counts[positions], minlength=n)
+        present = counts > 0
+
+        agg = pd.DataFrame({
+            "Product": self.products_[present],
+            "Total_Sales": np.bincount(codes, weights=self.sales[positions], minlength=n)[present],
+            "Total_Quantity": np.bincount(codes, weights=self.quantity[positions], minlength=n)[present],
+            "Transaction_Count": counts[present].astype(np.int64),
+        })
+        return complete_product_aggregates(agg)
+
+    def period_totals(self, grain="day", start=None, end=None, products=None):
+        """
+        Sales per period (Date, Total_Sales), like df.groupby("Date") at day grain.
+        """
+
+        cube = self.rollup(grain)
+        positions = cube._cell_positions(start, end, products)
+        codes = cube.date_codes[positions]
+
+        sales = np.bincount(codes, weights=cube.sales[positions], minlength=len(cube.dates_))
+        present = np.bincount(codes, minlength=len(cube.dates_)) > 0
+
+        return pd.DataFrame({"Date": cube.dates_[present], "Total_Sales": sales[present]})
+
+    def product_daily(self):
+        """
+        (Date, Product, Total_Sales) per product and sales day, sorted by
+        product then date: the input of forecasting.build_product_daily.
+        """
+
+        cells = self.by_product
+        return pd.DataFrame({
+            "Date": self.dates_[self.date_codes[cells]],
+            "Product": self.products_[self.product_codes[cells]],
+            "Total_Sales": self.sales[cells],
+        })
+
+
+@profiled()
+def build_sales_cube(df):
+    """
+    Build the day cube of a cleaned frame (or of product-day cells with
+    Total_Quantity / Transaction_Count) plus its week / month rollups.
+
+    Steps:
+    1) Factorize dates and products to sorted codes
+    2) Aggregate rows into (day, product) cells
+    3) Roll the day cells up to week and month cells
+    """
+
+    date_codes, dates = pd.factorize(df["Date"], sort=True)
+    product_codes, products = pd.factorize(df["Product"], sort=True)
+
+    # Pre-aggregated (day, product) cells, e.g. OutOfCoreEngine.product_day_cells()
+    if "Transaction_Count" in df.columns:
+        quantity = df["Total_Quantity"].to_numpy(dtype=np.float64)
+        counts = df["Transaction_Count"].to_numpy(dtype=np.float64)
+    else:
+        quantity = df["Quantity"].to_numpy(dtype=np.float64)
+        counts = np.ones(len(df), dtype=np.float64)
+
+    cube = SalesCube(
+        pd.DatetimeIndex(dates), products, date_codes, product_codes,
+        df["Total_Sales"].to_numpy(dtype=np.float64), quantity, counts,
+    )
+
+    for grain in GRAINS[1:]:
+        period_codes, periods = pd.factorize(_period_starts(cube.dates_, grain), sort=True)
+        cube.rollups[grain] = SalesCube(
+            pd.DatetimeIndex(periods), cube.products_,
+            period_codes[cube.date_codes], cube.product_codes,
+            cube.sales, cube.quantity, cube.counts.astype(np.float64),
+            grain=grain,
+        )
+
+    return cube
@@ -0,0 +1,74 @@
+import sys
+from collections import OrderedDict
+
+import pandas as pd
+
+MAX_SESSION_CACHE_BYTES = 256 * 1024 ** 2
+
+
+def estimate_bytes(value):
+    """
+    Rough in-memory size of a cached result (frames, series, arrays, tuples, dicts).
+    """
+
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(estimate_bytes(v) for v in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_bytes(v) for v in value.values())
+    if hasattr(value, "nbytes"):
+        # numpy arrays and array-backed structures (e.g. sales_cube.SalesCube)
+        return int(value.nbytes)
+    return sys.getsizeof(value)
+
+
+class DerivedCache:
+    """
+    Per-session memo of results derived from the cleaned dataset.
+
+    Every entry belongs to one dataset fingerprint. Asking for a different
+    fingerprint (new upload or new column mapping) drops all entries, and
+    least recently used entries are evicted past max_bytes.
+    """
+
+    def __init__(self, max_bytes=MAX_SESSION_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.fingerprint = None
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+
+    def clear(self):
+        self.entries.clear()
+        self.total_bytes = 0
+
+    def get(self, fingerprint, name, compute):
+        """
+        Return the cached result for (fingerprint, name), computing it on a miss.
+        """
+
+        if fingerprint != self.fingerprint:
+            self.clear()
+            self.fingerprint = fingerprint
+
+        if name in self.entries:
+            self.entries.move_to_end(name)
+            return self.entries[name][0]
+
+        value = compute()
+        size = estimate_bytes(value)
+
+        # Results bigger than the whole budget are returned but not kept
+        if size > self.max_bytes:
+            return value
+
+        self.entries[name] = (value, size)
+        self.total_bytes += size
+
+        while self.total_bytes > self.max_bytes:
+            _, (_, old_size) = self.entries.popitem(last=False)
+            self.total_bytes -= old_size
+
+        return value
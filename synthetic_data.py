@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+
+# Exponent of the rank-popularity curve (1.0: classic Zipf shares, bounded by n_products)
+POPULARITY_SKEW = 1.0
+
+
+def make_sales_data(n_rows=100_000, n_products=200, n_days=365, start="2023-01-01", seed=42):
+    """
+    Seeded synthetic transactions in the cleaned schema
+    (Date, Product, Quantity, Price, Total_Sales).
+
+    Products get skewed popularity (share ~ 1 / rank, over a shuffled rank
+    order), their own price, a weekly pattern and a slow trend, so
+    forecasting backends have real signal to learn. Every product sells at
+    least once when n_rows >= n_products, so n_products is the actual
+    cardinality.
+    """
+
+    rng = np.random.default_rng(seed)
+
+    products = np.array([f"SKU-{i:05d}" for i in range(n_products)], dtype=object)
+    popularity = 1.0 / rng.permutation(np.arange(1, n_products + 1)).astype(np.float64) ** POPULARITY_SKEW
+    popularity /= popularity.sum()
+    prices = np.round(rng.lognormal(2.5, 0.8, n_products), 2)
+    trend = rng.normal(0.0, 0.5, n_products)
+    weekly = 1.0 + 0.3 * np.sin(np.arange(7) * 2 * np.pi / 7 + rng.uniform(0, 2 * np.pi))
+
+    # One row per product first, the rest by popularity, then shuffled
+    guaranteed = rng.permutation(n_products)[:n_rows]
+    sampled = rng.choice(n_products, size=n_rows - len(guaranteed), p=popularity)
+    product_idx = rng.permutation(np.concatenate([guaranteed, sampled]))
+
+    distinct = np.count_nonzero(np.bincount(product_idx, minlength=n_products))
+    if distinct != min(n_products, n_rows):
+        raise AssertionError(f"Generated {distinct} products, expected {min(n_products, n_rows)}")
+    day_idx = rng.integers(0, n_days, size=n_rows)
+    dates = pd.Timestamp(start) + pd.to_timedelta(day_idx, unit="D")
+
+    scale = weekly[dates.dayofweek] * np.maximum(0.2, 1.0 + trend[product_idx] * day_idx / n_days)
+    quantity = rng.poisson(2.0 * scale) + 1
+
+    return pd.DataFrame({
+        "Date": dates,
+        "Product": products[product_idx],
+        "Quantity": quantity,
+        "Price": prices[product_idx],
+        "Total_Sales": quantity * prices[product_idx],
+    })
+
+
+# Raw date formats the preprocess date parser has to deal with
+RAW_DATE_FORMATS = {
+    "iso": "%Y-%m-%d",
+    "us": "%m/%d/%Y",
+    "day_first": "%d/%m/%Y",
+    "text": "%b %d, %Y",
+    "iso_time": "%Y-%m-%d %H:%M:%S",
+}
+
+
+def make_raw_sales_data(n_rows=100_000, n_products=200, n_days=365, start="2023-01-01",
+                        date_formats=("iso",), dirty_ratio=0.0, seed=42):
+    """
+    Seeded raw (uncleaned) export, as a user would upload it.
+
+    Columns: Order Date, Item, Qty, Unit Price (mapping for preprocess_data).
+    - date_formats: mix of RAW_DATE_FORMATS keys, spread evenly over rows
+    - dirty_ratio: share of rows broken on purpose (bad dates, missing or
+      negative quantities, non-numeric prices, exact duplicate rows)
+
+    Built fully vectorized so 10M-row inputs generate in seconds.
+    """
+
+    rng = np.random.default_rng(seed)
+    clean = make_sales_data(n_rows, n_products, n_days, start, seed)
+
+    # Format dates once per (day, format), then index into them
+    days = pd.date_range(start, periods=n_days)
+    day_idx = ((clean["Date"] - pd.Timestamp(start)).dt.days).to_numpy()
+    fmt_idx = rng.integers(0, len(date_formats), size=n_rows)
+
+    table = np.empty((len(date_formats), n_days), dtype=object)
+    for i, name in enumerate(date_formats):
+        table[i] = days.strftime(RAW_DATE_FORMATS[name]).to_numpy(dtype=object)
+
+    raw = pd.DataFrame({
+        "Order Date": table[fmt_idx, day_idx],
+        "Item": clean["Product"].to_numpy(),
+        "Qty": clean["Quantity"].to_numpy().astype(np.float64),
+        "Unit Price": clean["Price"].to_numpy().astype(object),
+    })
+
+    n_dirty = int(n_rows * dirty_ratio)
+    if n_dirty:
+        dirty = rng.choice(n_rows, size=n_dirty, replace=False)
+        kinds = rng.integers(0, 5, size=n_dirty)
+
+        raw.loc[dirty[kinds == 0], "Order Date"] = "not a date"
+        raw.loc[dirty[kinds == 1], "Qty"] = np.nan
+        raw.loc[dirty[kinds == 2], "Qty"] = -1
+        raw.loc[dirty[kinds == 3], "Unit Price"] = "N/A"
+
+        # Exact duplicates of other rows
+        dup_rows = dirty[kinds == 4]
+        raw.iloc[dup_rows] = raw.iloc[rng.choice(n_rows, size=len(dup_rows))].to_numpy()
+
+    return raw
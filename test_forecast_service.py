@@ -0,0 +1,117 @@
+import json
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from forecast_service import ForecastService, start_background_server
+from forecasting import predict_product_future_sales, train_product_forecast_model
+from model_registry import register_model
+from preprocess import compact_frame
+from synthetic_data import make_sales_data
+
+START_DATE = "2027-01-01"
+HORIZON = 5
+
+
+@pytest.fixture(scope="module")
+def trained(tmp_path_factory):
+    df = compact_frame(make_sales_data(5000, n_products=12, n_days=90, seed=3))
+    model, le = train_product_forecast_model(df, backend="random_forest", n_estimators=10, n_jobs=1)
+
+    registry = str(tmp_path_factory.mktemp("registry"))
+    key = register_model("fp", {"backend": "random_forest"}, model, le, df, registry_dir=registry)
+    return df, model, le, registry, key
+
+
+@pytest.fixture
+def server(trained):
+    service = ForecastService(trained[3], batch_window_ms=50)
+    url, stop = start_background_server(service)
+    yield service, url
+    stop()
+
+
+def _post(url, body):
+    request = urllib.request.Request(url + "/forecast", data=json.dumps(body).encode(), method="POST")
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_batched_forecasts_match_predict_product_future_sales(trained, server):
+    df, model, le, _, key = trained
+    service, url = server
+    products = [str(p) for p in le.classes_]
+
+    with ThreadPoolExecutor(len(products)) as pool:
+        answers = list(pool.map(
+            lambda product: _post(url, {"model": key, "products": [product],
+                                        "horizon": HORIZON, "start_date": START_DATE}),
+            products
+        ))
+
+    expected = predict_product_future_sales(df, model, le, HORIZON, start_date=START_DATE)
+    for product, (status, answer) in zip(products, answers):
+        assert status == 200
+        (forecast,) = answer["forecasts"]
+        rows = expected[expected["Product"].astype(str) == product]
+        assert forecast["product"] == product
+        assert forecast["dates"] == rows["Date"].dt.strftime("%Y-%m-%d").tolist()
+        np.testing.assert_allclose(forecast["predicted_sales"], rows["Predicted_Sales"].to_numpy())
+
+    # Concurrent requests shared model.predict calls
+    assert service.counters["batches"] < len(products)
+
+
+def test_repeated_forecast_is_cached(trained, server):
+    key = trained[4]
+    service, url = server
+    body = {"model": key, "products": [str(trained[2].classes_[0])], "horizon": 3, "start_date": START_DATE}
+
+    first = _post(url, body)
+    second = _post(url, body)
+
+    assert first == second
+    assert service.counters["cache_hits"] == 1
+
+
+def test_invalid_requests(trained, server):
+    key = trained[4]
+    _, url = server
+
+    assert _post(url, {"model": key, "products": "SKU-1"})[0] == 400
+    assert _post(url, {"model": key, "horizon": 0})[0] == 400
+    assert _post(url, {"model": "missing"})[0] == 404
+
+    status, answer = _post(url, {"model": key, "products": ["not-a-product"], "start_date": START_DATE})
+    assert status == 200
+    assert answer["skipped"] == ["not-a-product"]
+
+
+def test_integer_product_ids(tmp_path):
+    # Models trained on numeric SKUs keep int classes; requests use names
+    df = make_sales_data(3000, n_products=6, n_days=60, seed=5)
+    df["Product"] = df["Product"].str.replace("SKU-", "").astype(int)
+    model, le = train_product_forecast_model(df, backend="seasonal_baseline")
+    key = register_model("ints", {"backend": "seasonal_baseline"}, model, le, df, registry_dir=str(tmp_path))
+
+    url, stop = start_background_server(ForecastService(str(tmp_path)))
+    try:
+        product = le.classes_[0]
+        status, answer = _post(url, {"model": key, "products": [str(product)],
+                                     "horizon": HORIZON, "start_date": START_DATE})
+    finally:
+        stop()
+
+    expected = predict_product_future_sales(df, model, le, HORIZON, selected_product=product,
+                                            start_date=START_DATE)
+    assert status == 200
+    assert answer["skipped"] == []
+    (forecast,) = answer["forecasts"]
+    assert forecast["product"] == str(product)
+    np.testing.assert_allclose(forecast["predicted_sales"], expected["Predicted_Sales"].to_numpy())
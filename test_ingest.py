@@ -0,0 +1,55 @@
+import io
+
+import pandas as pd
+
+from forecasting import train_product_forecast_model
+from ingest import load_clean_streaming
+from preprocess import preprocess_data
+
+MAPPING = ("Date", "Product", "Qty", "Price")
+
+
+def _mixed_product_csv():
+    # First chunk: numeric SKUs only (read as int); later chunks mix in text
+    # (read as str), so "100" shows up with both dtypes
+    numeric = pd.DataFrame({
+        "Date": pd.date_range("2024-01-01", periods=40).strftime("%Y-%m-%d"),
+        "Product": [100, 101, 102, 103] * 10,
+        "Qty": 1,
+        "Price": 2.5,
+    })
+    mixed = pd.DataFrame({
+        "Date": pd.date_range("2024-02-10", periods=40).strftime("%Y-%m-%d"),
+        "Product": ["100", "X0", "X1", "X2", "X3", "101", "102", "103"] * 5,
+        "Qty": 2,
+        "Price": 1.5,
+    })
+    return pd.concat([numeric, mixed]).to_csv(index=False).encode()
+
+
+def test_streaming_matches_preprocess_data_on_mixed_product_dtypes():
+    data = _mixed_product_csv()
+
+    streamed, raw_rows, _ = load_clean_streaming(io.BytesIO(data), *MAPPING, chunksize=40)
+    whole = preprocess_data(pd.read_csv(io.BytesIO(data)), *MAPPING)
+
+    assert raw_rows == 80
+    assert sorted(streamed["Product"].unique()) == sorted(whole["Product"].unique())
+    assert streamed["Product"].nunique() == 8
+
+    key = ["Date", "Product"]
+    left = streamed.astype({"Product": str}).sort_values(key).reset_index(drop=True)
+    right = whole.astype({"Product": str}).sort_values(key).reset_index(drop=True)
+    pd.testing.assert_frame_equal(left, right, check_dtype=False)
+
+    # Mixed int / str categories used to break the encoder's sort
+    model, le = train_product_forecast_model(streamed, backend="seasonal_baseline")
+    assert len(le.classes_) == 8
+
+
+def test_whole_number_float_products_match_int_products():
+    data = b"Date,Product,Qty,Price\n2024-01-01,100,1,2\n2024-01-02,,1,2\n2024-01-03,100.0,1,2\n"
+
+    df = preprocess_data(pd.read_csv(io.BytesIO(data)), *MAPPING)
+
+    assert df["Product"].tolist() == ["100", "100"]
@@ -0,0 +1,74 @@
+import threading
+
+from jobs import JobManager, LocalExecutor
+
+
+def _train(value, progress):
+    progress(0.5, "Halfway")
+    return value * 2
+
+
+def _fail(progress):
+    raise ValueError("bad mapping")
+
+
+def test_local_executor_runs_job_inline():
+    jobs = JobManager(executor=LocalExecutor())
+
+    job = jobs.get(jobs.submit("train:a", _train, 21, name="Train"))
+
+    assert job.status == "done"
+    assert job.result == 42
+    assert job.progress == 1.0
+    assert job.name == "Train"
+
+
+def test_failed_job_keeps_error_and_frees_key():
+    jobs = JobManager(executor=LocalExecutor())
+
+    failed = jobs.get(jobs.submit("train:a", _fail))
+
+    assert failed.status == "failed"
+    assert failed.error == "bad mapping"
+    assert not failed.active
+    assert jobs.snapshot(failed.id)["status"] == "failed"
+
+    # A failed job is not reused: the same key can be retried
+    retry = jobs.submit("train:a", _train, 1)
+    assert retry != failed.id
+    assert jobs.get(retry).status == "done"
+
+
+def test_active_job_with_same_key_is_reused():
+    release = threading.Event()
+    calls = []
+
+    def blocked(progress):
+        calls.append(1)
+        release.wait(5)
+        return "model"
+
+    jobs = JobManager(max_workers=2)
+    try:
+        first = jobs.submit("train:a", blocked)
+        assert jobs.submit("train:a", blocked) == first
+        other = jobs.submit("train:b", _train, 1)
+        assert other != first
+
+        release.set()
+        jobs.shutdown(wait=True)
+    finally:
+        release.set()
+
+    assert jobs.get(first).status == "done"
+    assert jobs.get(first).result == "model"
+    assert len(calls) == 1
+
+
+def test_finished_jobs_are_pruned():
+    jobs = JobManager(executor=LocalExecutor(), max_finished=3)
+
+    ids = [jobs.submit(f"job:{i}", _train, i) for i in range(6)]
+
+    assert len(jobs.list_jobs()) <= 4
+    assert jobs.get(ids[-1]).result == 10
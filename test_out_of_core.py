@@ -0,0 +1,65 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis import analyze_sales
+from ingest import load_clean_streaming
+from out_of_core import available_engines, load_out_of_core
+from synthetic_data import make_raw_sales_data
+
+MAPPING = ("Order Date", "Item", "Qty", "Unit Price", None)
+
+ENGINES = [
+    "arrow",
+    pytest.param("duckdb", marks=pytest.mark.skipif(
+        "duckdb" not in available_engines(), reason="DuckDB is not installed"
+    )),
+]
+
+
+@pytest.fixture(scope="module")
+def csv_bytes():
+    raw = make_raw_sales_data(20_000, n_products=40, n_days=90, dirty_ratio=0.02, seed=11)
+    # Repeat a block so duplicates span chunks
+    return pd.concat([raw, raw.iloc[:3000]]).to_csv(index=False).encode()
+
+
+@pytest.fixture(scope="module")
+def in_memory(csv_bytes):
+    df, raw_rows, _ = load_clean_streaming(io.BytesIO(csv_bytes), *MAPPING)
+    return df, raw_rows
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_engine_matches_in_memory_pipeline(engine, csv_bytes, in_memory, tmp_path):
+    df, raw_rows = in_memory
+
+    ooc, ooc_raw_rows = load_out_of_core(
+        io.BytesIO(csv_bytes), "test", *MAPPING, root=str(tmp_path), engine=engine
+    )
+
+    assert ooc.engine == engine
+    assert ooc_raw_rows == raw_rows
+    assert ooc.row_count() == len(df)
+
+    summary, top_df, low_df, product_summary = ooc.analyze()
+    ref_summary, ref_top, ref_low, ref_products = analyze_sales(df)
+
+    assert summary["Total Rows"] == ref_summary["Total Rows"]
+    assert summary["Total Products"] == ref_summary["Total Products"]
+    assert summary["Total Sales"] == pytest.approx(ref_summary["Total Sales"])
+    for got, want in [(top_df, ref_top), (low_df, ref_low), (product_summary, ref_products)]:
+        assert got["Product"].astype(str).tolist() == want["Product"].astype(str).tolist()
+        np.testing.assert_allclose(got["Total_Sales"], want["Total_Sales"])
+
+    daily = ooc.daily_sales()
+    ref_daily = df.groupby("Date", as_index=False)["Total_Sales"].sum()
+    assert (daily["Date"].to_numpy() == ref_daily["Date"].to_numpy()).all()
+    np.testing.assert_allclose(daily["Total_Sales"], ref_daily["Total_Sales"])
+
+    cells = ooc.product_day_cells()
+    ref_cells = df.groupby(["Product", "Date"], observed=True)["Total_Sales"].sum()
+    assert len(cells) == len(ref_cells)
+    np.testing.assert_allclose(cells["Total_Sales"].sum(), ref_cells.sum())